@@ -1,14 +1,26 @@
+import copy
+import hashlib
+import heapq
+import itertools
 import logging
 import os
+import signal
 import socket
+import struct
 import threading
 import time
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import yaml
-from prometheus_client import Enum, Gauge, Info, start_http_server
+from prometheus_client import Counter, Enum, Gauge, Info, start_http_server
 from pyrad import client, dictionary, packet
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s")
 LOGGER = logging.getLogger("radius_exporter")
@@ -17,64 +29,157 @@ CONFIG_PATH = os.getenv("EXPORTER_CONFIG", "/app/config.yml")
 DEFAULT_PORT = int(os.getenv("EXPORTER_PORT", "9812"))
 DEFAULT_INTERVAL = int(os.getenv("EXPORTER_INTERVAL", "60"))
 DEFAULT_TIMEOUT = float(os.getenv("EXPORTER_TIMEOUT", "5"))
+DEFAULT_WORKERS = int(os.getenv("EXPORTER_WORKERS", str(min(32, 2 * (os.cpu_count() or 1)))))
+EMIT_MESSAGE_INFO = os.getenv("EXPORTER_EMIT_MESSAGE_INFO", "0") == "1"
 NAS_IDENTIFIER = os.getenv("EXPORTER_NAS_IDENTIFIER", "uxi-radius-probe")
 CALLING_STATION = os.getenv("EXPORTER_CALLING_STATION", "00:00:00:00:00:00")
 
+# SIGINT/SIGTERM set SHUTDOWN and SIGHUP sets RELOAD; either one wakes main().
+SHUTDOWN = threading.Event()
+RELOAD = threading.Event()
+_WAKE = threading.Event()
+
 SUCCESS_GAUGE = Gauge(
     "radius_probe_success",
     "Result of the most recent RADIUS authentication attempt (1=success, 0=failure)",
-    ["name", "address"],
+    ["name"],
 )
 DURATION_GAUGE = Gauge(
     "radius_probe_duration_seconds",
     "Duration in seconds of the most recent RADIUS authentication attempt",
-    ["name", "address"],
+    ["name"],
 )
 ERROR_GAUGE = Gauge(
     "radius_probe_error",
     "1 when the last RADIUS probe ended in error",
-    ["name", "address"],
+    ["name"],
 )
 STATE_ENUM = Enum(
     "radius_probe_state",
     "State of the RADIUS authenticator probe",
     states=["ok", "error"],
-    labelnames=["name", "address"],
+    labelnames=["name"],
+)
+RESULT_REASONS = ("accept", "reject", "unexpected", "timeout", "network", "error")
+RESULT_COUNTER = Counter(
+    "radius_probe_results",
+    "RADIUS probe outcomes by reason",
+    ["name", "reason"],
 )
-MESSAGE_INFO = Info(
-    "radius_probe_message",
-    "Textual description of the most recent RADIUS probe",
-    ["name", "address"],
+# Free-form messages create a new series per distinct text, so they are opt-in.
+MESSAGE_INFO = (
+    Info(
+        "radius_probe_message",
+        "Textual description of the most recent RADIUS probe",
+        ["name"],
+    )
+    if EMIT_MESSAGE_INFO
+    else None
 )
 LAST_RUN_GAUGE = Gauge(
     "radius_probe_last_run_timestamp_seconds",
     "Timestamp of the last RADIUS probe execution",
-    ["name", "address"],
+    ["name"],
 )
+TARGET_INFO = Info(
+    "radius_probe_target",
+    "Endpoint exercised by the RADIUS authenticator probe",
+    ["name"],
+)
+PROBE_METRICS = tuple(
+    metric
+    for metric in (
+        SUCCESS_GAUGE,
+        DURATION_GAUGE,
+        ERROR_GAUGE,
+        STATE_ENUM,
+        MESSAGE_INFO,
+        LAST_RUN_GAUGE,
+        TARGET_INFO,
+    )
+    if metric is not None
+)
+
+_CONFIG_CACHE: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+_CONFIG_LOCK = threading.Lock()
 
 
 def load_config(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
         LOGGER.warning("Configuration file %s not found, using defaults", path)
         return {"interval": DEFAULT_INTERVAL, "timeout": DEFAULT_TIMEOUT, "targets": []}
 
+    # Atomic rewrites (ConfigMap/Ansible template) change the inode, in-place edits the mtime/size.
+    key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _CONFIG_LOCK:
+        cached = _CONFIG_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return copy.deepcopy(cached[1])
+
     with open(path, "r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
+        data = yaml.load(handle, Loader=_YamlLoader) or {}
 
     data.setdefault("interval", DEFAULT_INTERVAL)
     data.setdefault("timeout", DEFAULT_TIMEOUT)
     data.setdefault("targets", [])
-    return data
+    with _CONFIG_LOCK:
+        _CONFIG_CACHE[path] = (key, data)
+    return copy.deepcopy(data)
+
+
+def classify_error(exc: Exception) -> str:
+    """Map a probe exception onto one of the fixed RESULT_REASONS."""
+    if isinstance(exc, (client.Timeout, socket.timeout)):
+        return "timeout"
+    if isinstance(exc, OSError):
+        return "network"
+    return "error"
+
+
+class PrebuiltAuthPacket(packet.AuthPacket):
+    """Access-Request whose static attributes were encoded once by the owning probe.
 
+    Only User-Password depends on the per-packet authenticator, so it is the
+    single attribute hidden and encoded per request (RFC 2865 section 5.2).
+    """
 
-class RadiusProbe(threading.Thread):
-    def __init__(self, config: Dict[str, Any], radius_dict: dictionary.Dictionary, default_interval: int, default_timeout: float) -> None:
-        super().__init__(daemon=True)
+    def __init__(self, static_attributes: bytes, password: bytes, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._static_attributes = static_attributes
+        self._password = password
+
+    def _PktEncodeAttributes(self) -> bytes:  # pylint: disable=invalid-name
+        hidden = self._hide_password()
+        return self._static_attributes + struct.pack("!BB", 2, len(hidden) + 2) + hidden
+
+    def _hide_password(self) -> bytes:
+        padded = self._password.ljust(max(16, (len(self._password) + 15) // 16 * 16), b"\x00")
+        result = bytearray()
+        last = self.authenticator
+        for offset in range(0, len(padded), 16):
+            digest = int.from_bytes(hashlib.md5(self.secret + last).digest(), "big")
+            block = (digest ^ int.from_bytes(padded[offset : offset + 16], "big")).to_bytes(16, "big")
+            result += block
+            last = block
+        return bytes(result)
+
+
+class RadiusProbe:
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        radius_dict: dictionary.Dictionary,
+        default_interval: int,
+        default_timeout: float,
+    ) -> None:
         self.config = config
+        self.defaults = (default_interval, default_timeout)
         self.radius_dict = radius_dict
         self.default_interval = max(1, int(config.get("interval", default_interval)))
         self.default_timeout = max(1.0, float(config.get("timeout", default_timeout)))
-        self.name = config.get("name", config.get("address", "unknown"))
+        self.name = self.probe_name(config)
         self.address = config.get("address", "127.0.0.1:1812")
         self.secret = (config.get("secret") or "").encode("utf-8")
         self.username = config.get("username", "uxi")
@@ -86,58 +191,104 @@ class RadiusProbe(threading.Thread):
         self.port = int(port)
         self.interval = int(config.get("interval", self.default_interval))
         self.timeout = float(config.get("timeout", self.default_timeout))
-        self._stop_event = threading.Event()
+        self.stopped = False
+        self._radius_client = client.Client(server=self.host, secret=self.secret, dict=self.radius_dict)
+        self._radius_client.timeout = self.timeout
+        self._radius_client.retries = 1
+        self._password = self.password.encode("utf-8")
+        # Encoded User-Name/NAS-*/Calling-Station-Id; rebuilt when the source address is rediscovered.
+        self._static_attributes: Optional[bytes] = None
+        self._m_success = SUCCESS_GAUGE.labels(name=self.name)
+        self._m_duration = DURATION_GAUGE.labels(name=self.name)
+        self._m_error = ERROR_GAUGE.labels(name=self.name)
+        self._m_state = STATE_ENUM.labels(name=self.name)
+        self._m_results = {
+            reason: RESULT_COUNTER.labels(name=self.name, reason=reason) for reason in RESULT_REASONS
+        }
+        self._m_message = MESSAGE_INFO.labels(name=self.name) if MESSAGE_INFO is not None else None
+        self._m_last_run = LAST_RUN_GAUGE.labels(name=self.name)
+        TARGET_INFO.labels(name=self.name).info({"address": self.address})
+        LOGGER.info("Starting RADIUS probe for %s (%s)", self.name, self.address)
 
-    def stop(self) -> None:
-        self._stop_event.set()
+    @staticmethod
+    def probe_name(config: Dict[str, Any]) -> str:
+        return config.get("name", config.get("address", "unknown"))
 
-    def run(self) -> None:
-        LOGGER.info("Starting RADIUS probe for %s (%s)", self.name, self.address)
-        while not self._stop_event.is_set():
-            self._execute_probe()
-            self._stop_event.wait(self.interval)
+    def close(self, *, keep_series: bool = False) -> None:
+        # Drop this probe's series so removed or renamed targets stop being exported,
+        # unless a replacement probe with the same name already owns them.
+        if not keep_series:
+            for metric in PROBE_METRICS:
+                try:
+                    metric.remove(self.name)
+                except KeyError:
+                    pass
+            for reason in RESULT_REASONS:
+                try:
+                    RESULT_COUNTER.remove(self.name, reason)
+                except KeyError:
+                    pass
 
-    def _execute_probe(self) -> None:
-        labels = {"name": self.name, "address": self.address}
+    def run_once(self) -> None:
         start_time = time.perf_counter()
         message = ""
         success = False
+        reason = "error"
         try:
             result_code = self._send_access_request()
             success = result_code == packet.AccessAccept
             if success:
+                reason = "accept"
                 message = "Access-Accept"
             elif result_code == packet.AccessReject:
+                reason = "reject"
                 message = "Access-Reject"
             else:
+                reason = "unexpected"
                 message = f"Unexpected RADIUS code {result_code}"
         except Exception as exc:  # pylint: disable=broad-except
+            reason = classify_error(exc)
             message = f"Probe error: {exc}"
             LOGGER.warning("RADIUS probe %s failed: %s", self.name, exc)
         finally:
             duration = time.perf_counter() - start_time
-            SUCCESS_GAUGE.labels(**labels).set(1 if success else 0)
-            DURATION_GAUGE.labels(**labels).set(duration)
-            ERROR_GAUGE.labels(**labels).set(0 if success else 1)
-            STATE_ENUM.labels(**labels).state("ok" if success else "error")
-            MESSAGE_INFO.labels(**labels).info({"message": message or ("success" if success else "failure")})
-            LAST_RUN_GAUGE.labels(**labels).set(time.time())
+            self._m_success.set(1 if success else 0)
+            self._m_duration.set(duration)
+            self._m_error.set(0 if success else 1)
+            self._m_state.state("ok" if success else "error")
+            self._m_results[reason].inc()
+            if self._m_message is not None:
+                self._m_message.info({"message": message or ("success" if success else "failure")})
+            self._m_last_run.set(time.time())
             LOGGER.debug("RADIUS probe %s completed in %.3fs: %s", self.name, duration, message)
 
     def _send_access_request(self) -> int:
-        radius_client = client.Client(server=self.host, secret=self.secret, dict=self.radius_dict)
-        radius_client.timeout = self.timeout
-        radius_client.retries = 1
-        request = radius_client.CreateAuthPacket(code=packet.AccessRequest, User_Name=self.username)
-        request["User-Password"] = request.PwCrypt(self.password)
-        request["NAS-Identifier"] = self.nas_identifier
+        if self._static_attributes is None:
+            self._static_attributes = self._encode_static_attributes(self._discover_source_ip())
+        request = PrebuiltAuthPacket(
+            self._static_attributes,
+            self._password,
+            code=packet.AccessRequest,
+            secret=self.secret,
+            dict=self.radius_dict,
+        )
         try:
-            request["Calling-Station-Id"] = self.calling_station
+            response = self._radius_client.SendPacket(request)
+        except (OSError, client.Timeout):
+            # Route or interface changes invalidate the cached source address.
+            self._static_attributes = None
+            raise
+        return response.code
+
+    def _encode_static_attributes(self, source_ip: str) -> bytes:
+        template = self._radius_client.CreateAuthPacket(code=packet.AccessRequest, User_Name=self.username)
+        template["NAS-Identifier"] = self.nas_identifier
+        try:
+            template["Calling-Station-Id"] = self.calling_station
         except Exception:  # pragma: no cover - optional attribute
             pass
-        request["NAS-IP-Address"] = self._discover_source_ip()
-        response = radius_client.SendPacket(request)
-        return response.code
+        template["NAS-IP-Address"] = source_ip
+        return template._PktEncodeAttributes()  # pylint: disable=protected-access
 
     def _discover_source_ip(self) -> str:
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
@@ -148,31 +299,151 @@ class RadiusProbe(threading.Thread):
                 return "127.0.0.1"
 
 
-def main() -> None:
-    config = load_config(CONFIG_PATH)
-    radius_dict = dictionary.Dictionary("/app/dictionary")
+class ProbeScheduler:
+    """Run probes from a single timer thread on a bounded worker pool."""
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="radius-probe")
+        self._heap: List[Tuple[float, int, RadiusProbe]] = []
+        self._sequence = itertools.count()
+        self._in_flight: Set[RadiusProbe] = set()
+        # Registered probes by name, so a deferred close can tell it has been replaced.
+        self._live: Dict[str, RadiusProbe] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="radius-scheduler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def add(self, probe: RadiusProbe) -> None:
+        with self._cond:
+            self._live[probe.name] = probe
+            self._push(probe, time.monotonic())
+
+    def remove(self, probe: RadiusProbe) -> None:
+        with self._cond:
+            probe.stopped = True
+            if self._live.get(probe.name) is probe:
+                del self._live[probe.name]
+            busy = probe in self._in_flight
+        # A probe that is mid-run is closed by _finish once it returns.
+        if not busy:
+            self._close(probe)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _push(self, probe: RadiusProbe, due: float) -> None:
+        # The sequence number breaks ties so probes themselves are never compared.
+        heapq.heappush(self._heap, (due, next(self._sequence), probe))
+        self._cond.notify()
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._closed:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, probe = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if probe.stopped:
+                    continue
+                self._in_flight.add(probe)
+                future = self._executor.submit(probe.run_once)
+                future.add_done_callback(lambda _future, probe=probe: self._finish(probe))
+
+    def _finish(self, probe: RadiusProbe) -> None:
+        with self._cond:
+            self._in_flight.discard(probe)
+            stopped = probe.stopped
+            if not stopped and not self._closed:
+                # Each probe is in flight at most once; the next run is due an interval after this one ends.
+                self._push(probe, time.monotonic() + probe.interval)
+        if stopped:
+            self._close(probe)
+
+    def _close(self, probe: RadiusProbe) -> None:
+        # A reload may register a replacement under the same name while this probe is
+        # still running; the replacement shares its label children, so keep them.
+        with self._cond:
+            replaced = probe.name in self._live
+        probe.close(keep_series=replaced)
+
+
+def _handle_signal(signum: int, _frame: Any) -> None:
+    if signum == signal.SIGHUP:
+        RELOAD.set()
+    else:
+        SHUTDOWN.set()
+    _WAKE.set()
+
+
+def sync_probes(
+    scheduler: ProbeScheduler,
+    probes: Dict[str, RadiusProbe],
+    config: Dict[str, Any],
+    radius_dict: dictionary.Dictionary,
+) -> None:
+    """Start, restart, or stop probes so they match the configured targets."""
     interval = int(config.get("interval", DEFAULT_INTERVAL))
     timeout = float(config.get("timeout", DEFAULT_TIMEOUT))
-    probes: List[RadiusProbe] = []
-
+    desired: Dict[str, Dict[str, Any]] = {}
     for target in config.get("targets", []):
         if not target.get("address") or not target.get("secret"):
             LOGGER.warning("Skipping RADIUS target with missing address or secret: %s", target)
             continue
-        probe = RadiusProbe(target, radius_dict, interval, timeout)
-        probe.start()
-        probes.append(probe)
+        desired[RadiusProbe.probe_name(target)] = target
+
+    for name, probe in list(probes.items()):
+        if desired.get(name) != probe.config or probe.defaults != (interval, timeout):
+            scheduler.remove(probe)
+            del probes[name]
+    for name, target in desired.items():
+        if name not in probes:
+            probe = RadiusProbe(target, radius_dict, interval, timeout)
+            scheduler.add(probe)
+            probes[name] = probe
+
+
+def main() -> None:
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, _handle_signal)
+
+    radius_dict = dictionary.Dictionary("/app/dictionary")
+    probes: Dict[str, RadiusProbe] = {}
+    scheduler = ProbeScheduler(DEFAULT_WORKERS)
+    scheduler.start()
+    sync_probes(scheduler, probes, load_config(CONFIG_PATH), radius_dict)
 
     start_http_server(DEFAULT_PORT)
     LOGGER.info("RADIUS exporter listening on %s", DEFAULT_PORT)
 
-    try:
-        while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
-        LOGGER.info("Stopping RADIUS exporter")
-        for probe in probes:
-            probe.stop()
+    while True:
+        _WAKE.wait()
+        _WAKE.clear()
+        if SHUTDOWN.is_set():
+            break
+        if RELOAD.is_set():
+            RELOAD.clear()
+            LOGGER.info("Reloading configuration from %s", CONFIG_PATH)
+            try:
+                sync_probes(scheduler, probes, load_config(CONFIG_PATH), radius_dict)
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Configuration reload failed, keeping current probes: %s", exc)
+
+    LOGGER.info("Stopping RADIUS exporter")
+    scheduler.shutdown()
+    for probe in probes.values():
+        probe.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+_SPEC = importlib.util.spec_from_file_location(
+    "voip_quality_exporter", Path(__file__).resolve().parents[1] / "voip" / "voip_quality_exporter.py"
+)
+voip_quality_exporter = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(voip_quality_exporter)
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_reload_while_probe_in_flight_keeps_series() -> None:
+    scheduler = voip_quality_exporter.ProbeScheduler(2)
+    scheduler.start()
+    probes = {}
+    profile = {"name": "a", "registrar": "127.0.0.1:9", "interval": 3600}
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_options():
+        started.set()
+        release.wait(5)
+        raise OSError("unreachable")
+
+    try:
+        voip_quality_exporter.sync_probes(scheduler, probes, {"profiles": [profile], "timeout": 5})
+        old = probes["a"]
+        old._send_options = blocking_options
+        assert started.wait(5)
+
+        # A changed timeout replaces the probe while the old one is still running.
+        voip_quality_exporter.sync_probes(scheduler, probes, {"profiles": [profile], "timeout": 1})
+        assert probes["a"] is not old
+        release.set()
+        _wait_for(lambda: not scheduler._in_flight)
+
+        assert REGISTRY.get_sample_value("voip_probe_success", {"name": "a"}) is not None
+    finally:
+        release.set()
+        scheduler.shutdown()
+        for probe in probes.values():
+            probe.close()
+    assert REGISTRY.get_sample_value("voip_probe_success", {"name": "a"}) is None
@@ -0,0 +1,53 @@
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+_SPEC = importlib.util.spec_from_file_location(
+    "vpn_exporter", Path(__file__).resolve().parents[1] / "vpn" / "vpn_exporter.py"
+)
+vpn_exporter = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(vpn_exporter)
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_reload_while_probe_in_flight_keeps_series() -> None:
+    scheduler = vpn_exporter.ProbeScheduler(2)
+    scheduler.start()
+    probes = {}
+    target = {"name": "a", "management_uri": "http://127.0.0.1:9", "interval": 3600}
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_request():
+        started.set()
+        release.wait(5)
+        raise OSError("unreachable")
+
+    try:
+        vpn_exporter.sync_probes(scheduler, probes, {"targets": [target], "timeout": 5})
+        old = probes["a"]
+        old._perform_request = blocking_request
+        assert started.wait(5)
+
+        # A changed timeout replaces the probe while the old one is still running.
+        vpn_exporter.sync_probes(scheduler, probes, {"targets": [target], "timeout": 1})
+        assert probes["a"] is not old
+        release.set()
+        _wait_for(lambda: not scheduler._in_flight)
+
+        assert REGISTRY.get_sample_value("vpn_probe_success", {"name": "a"}) is not None
+    finally:
+        release.set()
+        scheduler.shutdown()
+        for probe in probes.values():
+            probe.close()
+    assert REGISTRY.get_sample_value("vpn_probe_success", {"name": "a"}) is None
@@ -1,14 +1,25 @@
+import binascii
+import copy
+import heapq
+import itertools
 import logging
+import math
 import os
+import signal
 import socket
 import threading
 import time
-import uuid
 from collections import deque
-from typing import Any, Deque, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 import yaml
-from prometheus_client import Enum, Gauge, Info, start_http_server
+from prometheus_client import Counter, Enum, Gauge, Info, start_http_server
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s")
@@ -18,57 +29,109 @@ CONFIG_PATH = os.getenv("EXPORTER_CONFIG", "/app/config.yml")
 DEFAULT_PORT = int(os.getenv("EXPORTER_PORT", "9899"))
 DEFAULT_INTERVAL = int(os.getenv("EXPORTER_INTERVAL", "30"))
 DEFAULT_TIMEOUT = float(os.getenv("EXPORTER_TIMEOUT", "5"))
+DEFAULT_WORKERS = int(os.getenv("EXPORTER_WORKERS", str(min(32, 2 * (os.cpu_count() or 1)))))
+EMIT_MESSAGE_INFO = os.getenv("EXPORTER_EMIT_MESSAGE_INFO", "0") == "1"
+JITTER_WINDOW = 8
+
+# SIGINT/SIGTERM set SHUTDOWN and SIGHUP sets RELOAD; either one wakes main().
+SHUTDOWN = threading.Event()
+RELOAD = threading.Event()
+_WAKE = threading.Event()
 
 SUCCESS_GAUGE = Gauge(
     "voip_probe_success",
     "Result of the most recent SIP OPTIONS transaction (1=success)",
-    ["name", "registrar"],
+    ["name"],
 )
 DURATION_GAUGE = Gauge(
     "voip_probe_duration_seconds",
     "Round-trip time for SIP OPTIONS",
-    ["name", "registrar"],
+    ["name"],
 )
 JITTER_GAUGE = Gauge(
     "voip_probe_jitter_ms",
     "Inter-probe jitter derived from latency deltas in milliseconds",
-    ["name", "registrar"],
+    ["name"],
 )
 MOS_GAUGE = Gauge(
     "voip_probe_mos",
     "Mean opinion score estimate computed from latency and jitter",
-    ["name", "registrar"],
+    ["name"],
 )
 STATE_ENUM = Enum(
     "voip_probe_state",
     "Quality state for the SIP profile",
     states=["excellent", "acceptable", "poor"],
-    labelnames=["name", "registrar"],
+    labelnames=["name"],
+)
+RESULT_REASONS = ("ok", "unexpected", "timeout", "network", "error")
+RESULT_COUNTER = Counter(
+    "voip_probe_results",
+    "VoIP probe outcomes by reason",
+    ["name", "reason"],
 )
-MESSAGE_INFO = Info(
-    "voip_probe_message",
-    "Result message for the SIP probe",
-    ["name", "registrar"],
+# Free-form messages create a new series per distinct text, so they are opt-in.
+MESSAGE_INFO = (
+    Info(
+        "voip_probe_message",
+        "Result message for the SIP probe",
+        ["name"],
+    )
+    if EMIT_MESSAGE_INFO
+    else None
 )
 LAST_RUN_GAUGE = Gauge(
     "voip_probe_last_run_timestamp_seconds",
     "Timestamp of the last SIP probe execution",
-    ["name", "registrar"],
+    ["name"],
+)
+TARGET_INFO = Info(
+    "voip_probe_target",
+    "SIP registrar exercised by the VoIP probe",
+    ["name"],
 )
+PROBE_METRICS = tuple(
+    metric
+    for metric in (
+        SUCCESS_GAUGE,
+        DURATION_GAUGE,
+        JITTER_GAUGE,
+        MOS_GAUGE,
+        STATE_ENUM,
+        MESSAGE_INFO,
+        LAST_RUN_GAUGE,
+        TARGET_INFO,
+    )
+    if metric is not None
+)
+
+_CONFIG_CACHE: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+_CONFIG_LOCK = threading.Lock()
 
 
 def load_config(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
         LOGGER.warning("Configuration file %s not found", path)
         return {"interval": DEFAULT_INTERVAL, "timeout": DEFAULT_TIMEOUT, "profiles": []}
 
+    # Atomic rewrites (ConfigMap/Ansible template) change the inode, in-place edits the mtime/size.
+    key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _CONFIG_LOCK:
+        cached = _CONFIG_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return copy.deepcopy(cached[1])
+
     with open(path, "r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
+        data = yaml.load(handle, Loader=_YamlLoader) or {}
 
     data.setdefault("interval", DEFAULT_INTERVAL)
     data.setdefault("timeout", DEFAULT_TIMEOUT)
     data.setdefault("profiles", [])
-    return data
+    with _CONFIG_LOCK:
+        _CONFIG_CACHE[path] = (key, data)
+    return copy.deepcopy(data)
 
 
 def parse_host_port(target: str) -> Tuple[str, int]:
@@ -78,28 +141,52 @@ def parse_host_port(target: str) -> Tuple[str, int]:
     return target, 5060
 
 
-def build_sip_options(host: str) -> str:
-    call_id = uuid.uuid4().hex
-    branch = uuid.uuid4().hex
-    return (
+def build_sip_options_template(host: str) -> Tuple[bytes, bytes, bytes]:
+    """Return the static OPTIONS segments surrounding the per-request branch and Call-ID."""
+    head = (
         f"OPTIONS sip:{host} SIP/2.0\r\n"
-        f"Via: SIP/2.0/UDP uxi-probe;branch=z9hG4bK{branch}\r\n"
+        "Via: SIP/2.0/UDP uxi-probe;branch=z9hG4bK"
+    )
+    middle = (
+        "\r\n"
         "Max-Forwards: 70\r\n"
         "From: <sip:uxi-probe@example.com>;tag=uxi\r\n"
         f"To: <sip:{host}>\r\n"
-        f"Call-ID: {call_id}@uxi\r\n"
+        "Call-ID: "
+    )
+    tail = (
+        "@uxi\r\n"
         "CSeq: 1 OPTIONS\r\n"
         "Contact: <sip:uxi-probe@example.com>\r\n"
         "Accept: application/sdp\r\n"
         "User-Agent: UXI Synthetic VoIP Probe\r\n"
         "Content-Length: 0\r\n\r\n"
     )
+    return head.encode("utf-8"), middle.encode("utf-8"), tail.encode("utf-8")
+
+
+def build_sip_options(template: Tuple[bytes, bytes, bytes]) -> bytes:
+    head, middle, tail = template
+    # Random 128-bit hex tokens, the same entropy uuid4() draws, without building UUID objects.
+    branch = binascii.hexlify(os.urandom(16))
+    call_id = binascii.hexlify(os.urandom(16))
+    return b"".join((head, branch, middle, call_id, tail))
 
 
-class VoipProbe(threading.Thread):
+def classify_error(exc: Exception) -> str:
+    """Map a probe exception onto one of the fixed RESULT_REASONS."""
+    if isinstance(exc, socket.timeout):
+        return "timeout"
+    if isinstance(exc, OSError):
+        return "network"
+    return "error"
+
+
+class VoipProbe:
     def __init__(self, config: Dict[str, Any], default_interval: int, default_timeout: float) -> None:
-        super().__init__(daemon=True)
-        self.name = config.get("name", config.get("registrar", "sip-profile"))
+        self.config = config
+        self.defaults = (default_interval, default_timeout)
+        self.name = self.probe_name(config)
         self.registrar = config.get("registrar", "127.0.0.1:5060")
         self.interval = int(config.get("interval", default_interval))
         self.timeout = float(config.get("timeout", default_timeout))
@@ -107,47 +194,80 @@ class VoipProbe(threading.Thread):
         self.transport = config.get("transport", "udp").lower()
         self.jitter_threshold = float(config.get("jitter_threshold_ms", 50))
         self.mos_threshold = float(config.get("mos_threshold", 3.5))
-        self._stop_event = threading.Event()
-        self.latency_history: Deque[float] = deque(maxlen=8)
+        self.stopped = False
+        # Jitter is the mean absolute delta across the last JITTER_WINDOW latencies.
+        self._latency_deltas: Deque[float] = deque(maxlen=JITTER_WINDOW - 1)
+        self._last_latency: Optional[float] = None
+        self._dest = parse_host_port(self.registrar)
+        self._sip_template = build_sip_options_template(self._dest[0])
+        self._udp_sock: Optional[socket.socket] = None
+        self._m_success = SUCCESS_GAUGE.labels(name=self.name)
+        self._m_duration = DURATION_GAUGE.labels(name=self.name)
+        self._m_jitter = JITTER_GAUGE.labels(name=self.name)
+        self._m_mos = MOS_GAUGE.labels(name=self.name)
+        self._m_state = STATE_ENUM.labels(name=self.name)
+        self._m_results = {
+            reason: RESULT_COUNTER.labels(name=self.name, reason=reason) for reason in RESULT_REASONS
+        }
+        self._m_message = MESSAGE_INFO.labels(name=self.name) if MESSAGE_INFO is not None else None
+        self._m_last_run = LAST_RUN_GAUGE.labels(name=self.name)
+        TARGET_INFO.labels(name=self.name).info({"registrar": self.registrar})
+        LOGGER.info("Starting VoIP probe for %s (%s)", self.name, self.registrar)
 
-    def stop(self) -> None:
-        self._stop_event.set()
+    @staticmethod
+    def probe_name(config: Dict[str, Any]) -> str:
+        return config.get("name", config.get("registrar", "sip-profile"))
 
-    def run(self) -> None:
-        LOGGER.info("Starting VoIP probe for %s (%s)", self.name, self.registrar)
-        while not self._stop_event.is_set():
-            self._execute_probe()
-            self._stop_event.wait(self.interval)
+    def close(self, *, keep_series: bool = False) -> None:
+        # Drop this probe's series so removed or renamed targets stop being exported,
+        # unless a replacement probe with the same name already owns them.
+        if not keep_series:
+            for metric in PROBE_METRICS:
+                try:
+                    metric.remove(self.name)
+                except KeyError:
+                    pass
+            for reason in RESULT_REASONS:
+                try:
+                    RESULT_COUNTER.remove(self.name, reason)
+                except KeyError:
+                    pass
+        self._close_udp_socket()
 
-    def _execute_probe(self) -> None:
-        labels = {"name": self.name, "registrar": self.registrar}
+    def run_once(self) -> None:
         start_time = time.perf_counter()
         message = ""
         success = False
         jitter_ms = 0.0
         mos = 1.0
+        reason = "error"
         try:
             response_line, latency = self._send_options()
             success = self.expected_response in response_line
             jitter_ms = self._compute_jitter(latency)
             mos = self._compute_mos(latency, jitter_ms)
             if success:
+                reason = "ok"
                 message = response_line
             else:
+                reason = "unexpected"
                 message = f"Unexpected response: {response_line}"
         except Exception as exc:  # pylint: disable=broad-except
+            reason = classify_error(exc)
             message = f"Probe error: {exc}"
             LOGGER.warning("VoIP probe %s failed: %s", self.name, exc)
         finally:
             duration = time.perf_counter() - start_time
             state = self._determine_state(success, jitter_ms, mos)
-            SUCCESS_GAUGE.labels(**labels).set(1 if success else 0)
-            DURATION_GAUGE.labels(**labels).set(duration)
-            JITTER_GAUGE.labels(**labels).set(jitter_ms)
-            MOS_GAUGE.labels(**labels).set(mos)
-            STATE_ENUM.labels(**labels).state(state)
-            MESSAGE_INFO.labels(**labels).info({"message": message or ("success" if success else "failure")})
-            LAST_RUN_GAUGE.labels(**labels).set(time.time())
+            self._m_success.set(1 if success else 0)
+            self._m_duration.set(duration)
+            self._m_jitter.set(jitter_ms)
+            self._m_mos.set(mos)
+            self._m_state.state(state)
+            self._m_results[reason].inc()
+            if self._m_message is not None:
+                self._m_message.info({"message": message or ("success" if success else "failure")})
+            self._m_last_run.set(time.time())
             LOGGER.debug(
                 "VoIP probe %s completed in %.3fs (jitter %.2f ms, MOS %.2f): %s",
                 self.name,
@@ -158,29 +278,60 @@ class VoipProbe(threading.Thread):
             )
 
     def _send_options(self) -> Tuple[str, float]:
-        host, port = parse_host_port(self.registrar)
-        payload = build_sip_options(host)
-        sock_type = socket.SOCK_DGRAM if self.transport == "udp" else socket.SOCK_STREAM
-        with socket.socket(socket.AF_INET, sock_type) as sock:
-            sock.settimeout(self.timeout)
-            start = time.perf_counter()
-            if self.transport == "tcp":
-                sock.connect((host, port))
-                sock.sendall(payload.encode("utf-8"))
+        payload = build_sip_options(self._sip_template)
+        if self.transport == "tcp":
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                start = time.perf_counter()
+                sock.connect(self._dest)
+                sock.sendall(payload)
                 data = sock.recv(2048)
-            else:
-                sock.sendto(payload.encode("utf-8"), (host, port))
+                latency = time.perf_counter() - start
+        else:
+            sock = self._udp_socket()
+            try:
+                start = time.perf_counter()
+                sock.sendto(payload, self._dest)
                 data, _ = sock.recvfrom(2048)
-            latency = time.perf_counter() - start
+                latency = time.perf_counter() - start
+            except socket.timeout:
+                raise
+            except OSError:
+                self._close_udp_socket()
+                raise
         line = data.decode(errors="ignore").split("\r\n", 1)[0]
         return line, latency
 
+    def _udp_socket(self) -> socket.socket:
+        sock = self._udp_sock
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._udp_sock = sock
+        else:
+            # Discard late replies to earlier timed-out probes so they are not
+            # mistaken for the response to this request.
+            sock.setblocking(False)
+            try:
+                while True:
+                    sock.recv(2048)
+            except (BlockingIOError, InterruptedError):
+                pass
+        sock.settimeout(self.timeout)
+        return sock
+
+    def _close_udp_socket(self) -> None:
+        if self._udp_sock is not None:
+            self._udp_sock.close()
+            self._udp_sock = None
+
     def _compute_jitter(self, latency: float) -> float:
-        self.latency_history.append(latency)
-        if len(self.latency_history) < 2:
+        last_latency = self._last_latency
+        self._last_latency = latency
+        if last_latency is None:
             return 0.0
-        deltas = [abs(self.latency_history[i] - self.latency_history[i - 1]) for i in range(1, len(self.latency_history))]
-        return sum(deltas) / len(deltas) * 1000.0
+        deltas = self._latency_deltas
+        deltas.append(abs(latency - last_latency))
+        return math.fsum(deltas) / len(deltas) * 1000.0
 
     def _compute_mos(self, latency: float, jitter_ms: float) -> float:
         latency_ms = latency * 1000.0
@@ -197,30 +348,145 @@ class VoipProbe(threading.Thread):
         return "acceptable"
 
 
-def main() -> None:
-    config = load_config(CONFIG_PATH)
+class ProbeScheduler:
+    """Run probes from a single timer thread on a bounded worker pool."""
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="voip-probe")
+        self._heap: List[Tuple[float, int, VoipProbe]] = []
+        self._sequence = itertools.count()
+        self._in_flight: Set[VoipProbe] = set()
+        # Registered probes by name, so a deferred close can tell it has been replaced.
+        self._live: Dict[str, VoipProbe] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="voip-scheduler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def add(self, probe: VoipProbe) -> None:
+        with self._cond:
+            self._live[probe.name] = probe
+            self._push(probe, time.monotonic())
+
+    def remove(self, probe: VoipProbe) -> None:
+        with self._cond:
+            probe.stopped = True
+            if self._live.get(probe.name) is probe:
+                del self._live[probe.name]
+            busy = probe in self._in_flight
+        # A probe that is mid-run is closed by _finish once it returns.
+        if not busy:
+            self._close(probe)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _push(self, probe: VoipProbe, due: float) -> None:
+        # The sequence number breaks ties so probes themselves are never compared.
+        heapq.heappush(self._heap, (due, next(self._sequence), probe))
+        self._cond.notify()
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._closed:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, probe = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if probe.stopped:
+                    continue
+                self._in_flight.add(probe)
+                future = self._executor.submit(probe.run_once)
+                future.add_done_callback(lambda _future, probe=probe: self._finish(probe))
+
+    def _finish(self, probe: VoipProbe) -> None:
+        with self._cond:
+            self._in_flight.discard(probe)
+            stopped = probe.stopped
+            if not stopped and not self._closed:
+                # Each probe is in flight at most once; the next run is due an interval after this one ends.
+                self._push(probe, time.monotonic() + probe.interval)
+        if stopped:
+            self._close(probe)
+
+    def _close(self, probe: VoipProbe) -> None:
+        # A reload may register a replacement under the same name while this probe is
+        # still running; the replacement shares its label children, so keep them.
+        with self._cond:
+            replaced = probe.name in self._live
+        probe.close(keep_series=replaced)
+
+
+def _handle_signal(signum: int, _frame: Any) -> None:
+    if signum == signal.SIGHUP:
+        RELOAD.set()
+    else:
+        SHUTDOWN.set()
+    _WAKE.set()
+
+
+def sync_probes(scheduler: ProbeScheduler, probes: Dict[str, VoipProbe], config: Dict[str, Any]) -> None:
+    """Start, restart, or stop probes so they match the configured profiles."""
     interval = int(config.get("interval", DEFAULT_INTERVAL))
     timeout = float(config.get("timeout", DEFAULT_TIMEOUT))
-    probes: List[VoipProbe] = []
-
+    desired: Dict[str, Dict[str, Any]] = {}
     for profile in config.get("profiles", []):
         if not profile.get("registrar"):
             LOGGER.warning("Skipping VoIP profile without registrar: %s", profile)
             continue
-        probe = VoipProbe(profile, interval, timeout)
-        probe.start()
-        probes.append(probe)
+        desired[VoipProbe.probe_name(profile)] = profile
+
+    for name, probe in list(probes.items()):
+        if desired.get(name) != probe.config or probe.defaults != (interval, timeout):
+            scheduler.remove(probe)
+            del probes[name]
+    for name, profile in desired.items():
+        if name not in probes:
+            probe = VoipProbe(profile, interval, timeout)
+            scheduler.add(probe)
+            probes[name] = probe
+
+
+def main() -> None:
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, _handle_signal)
+
+    probes: Dict[str, VoipProbe] = {}
+    scheduler = ProbeScheduler(DEFAULT_WORKERS)
+    scheduler.start()
+    sync_probes(scheduler, probes, load_config(CONFIG_PATH))
 
     start_http_server(DEFAULT_PORT)
     LOGGER.info("VoIP exporter listening on %s", DEFAULT_PORT)
 
-    try:
-        while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
-        LOGGER.info("Stopping VoIP exporter")
-        for probe in probes:
-            probe.stop()
+    while True:
+        _WAKE.wait()
+        _WAKE.clear()
+        if SHUTDOWN.is_set():
+            break
+        if RELOAD.is_set():
+            RELOAD.clear()
+            LOGGER.info("Reloading configuration from %s", CONFIG_PATH)
+            try:
+                sync_probes(scheduler, probes, load_config(CONFIG_PATH))
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Configuration reload failed, keeping current probes: %s", exc)
+
+    LOGGER.info("Stopping VoIP exporter")
+    scheduler.shutdown()
+    for probe in probes.values():
+        probe.close()
 
 
 if __name__ == "__main__":
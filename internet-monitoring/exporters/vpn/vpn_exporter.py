@@ -1,14 +1,25 @@
+import copy
+import heapq
+import itertools
 import logging
 import os
+import signal
 import threading
 import time
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Set, Tuple
 
 import requests
 import yaml
-from prometheus_client import Enum, Gauge, Info, start_http_server
+from prometheus_client import Counter, Enum, Gauge, Info, start_http_server
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s")
 LOGGER = logging.getLogger("vpn_exporter")
@@ -17,59 +28,118 @@ CONFIG_PATH = os.getenv("EXPORTER_CONFIG", "/app/config.yml")
 DEFAULT_PORT = int(os.getenv("EXPORTER_PORT", "9310"))
 DEFAULT_INTERVAL = int(os.getenv("EXPORTER_INTERVAL", "60"))
 DEFAULT_TIMEOUT = float(os.getenv("EXPORTER_TIMEOUT", "5"))
+DEFAULT_WORKERS = int(os.getenv("EXPORTER_WORKERS", str(min(32, 2 * (os.cpu_count() or 1)))))
+EMIT_MESSAGE_INFO = os.getenv("EXPORTER_EMIT_MESSAGE_INFO", "0") == "1"
+
+# SIGINT/SIGTERM set SHUTDOWN and SIGHUP sets RELOAD; either one wakes main().
+SHUTDOWN = threading.Event()
+RELOAD = threading.Event()
+_WAKE = threading.Event()
 
 SUCCESS_GAUGE = Gauge(
     "vpn_probe_success",
     "Result of the most recent VPN health probe (1=success)",
-    ["name", "uri"],
+    ["name"],
 )
 DURATION_GAUGE = Gauge(
     "vpn_probe_duration_seconds",
     "HTTP round trip time for the VPN management endpoint",
-    ["name", "uri"],
+    ["name"],
 )
 STATUS_CODE_GAUGE = Gauge(
     "vpn_probe_status_code",
     "HTTP status code from the management endpoint",
-    ["name", "uri"],
+    ["name"],
 )
 STATE_ENUM = Enum(
     "vpn_probe_state",
     "State of the VPN probe",
     states=["ok", "degraded", "error"],
-    labelnames=["name", "uri"],
+    labelnames=["name"],
+)
+RESULT_REASONS = ("ok", "unexpected", "timeout", "network", "error")
+RESULT_COUNTER = Counter(
+    "vpn_probe_results",
+    "VPN probe outcomes by reason",
+    ["name", "reason"],
 )
-MESSAGE_INFO = Info(
-    "vpn_probe_message",
-    "Human readable result for the latest VPN probe",
-    ["name", "uri"],
+# Free-form messages create a new series per distinct text, so they are opt-in.
+MESSAGE_INFO = (
+    Info(
+        "vpn_probe_message",
+        "Human readable result for the latest VPN probe",
+        ["name"],
+    )
+    if EMIT_MESSAGE_INFO
+    else None
 )
 LAST_RUN_GAUGE = Gauge(
     "vpn_probe_last_run_timestamp_seconds",
     "Timestamp of the last VPN probe execution",
-    ["name", "uri"],
+    ["name"],
+)
+TARGET_INFO = Info(
+    "vpn_probe_target",
+    "Management endpoint exercised by the VPN probe",
+    ["name"],
+)
+PROBE_METRICS = tuple(
+    metric
+    for metric in (
+        SUCCESS_GAUGE,
+        DURATION_GAUGE,
+        STATUS_CODE_GAUGE,
+        STATE_ENUM,
+        MESSAGE_INFO,
+        LAST_RUN_GAUGE,
+        TARGET_INFO,
+    )
+    if metric is not None
 )
 
+_CONFIG_CACHE: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+_CONFIG_LOCK = threading.Lock()
+
 
 def load_config(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
         LOGGER.warning("Configuration file %s not found", path)
         return {"interval": DEFAULT_INTERVAL, "timeout": DEFAULT_TIMEOUT, "targets": []}
 
+    # Atomic rewrites (ConfigMap/Ansible template) change the inode, in-place edits the mtime/size.
+    key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _CONFIG_LOCK:
+        cached = _CONFIG_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return copy.deepcopy(cached[1])
+
     with open(path, "r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
+        data = yaml.load(handle, Loader=_YamlLoader) or {}
 
     data.setdefault("interval", DEFAULT_INTERVAL)
     data.setdefault("timeout", DEFAULT_TIMEOUT)
     data.setdefault("targets", [])
-    return data
+    with _CONFIG_LOCK:
+        _CONFIG_CACHE[path] = (key, data)
+    return copy.deepcopy(data)
+
 
+def classify_error(exc: Exception) -> str:
+    """Map a probe exception onto one of the fixed RESULT_REASONS."""
+    if isinstance(exc, requests.Timeout):
+        return "timeout"
+    if isinstance(exc, (requests.ConnectionError, OSError)):
+        return "network"
+    return "error"
 
-class VpnProbe(threading.Thread):
+
+class VpnProbe:
     def __init__(self, config: Dict[str, Any], default_interval: int, default_timeout: float) -> None:
-        super().__init__(daemon=True)
         self.config = config
-        self.name = config.get("name", config.get("management_uri", "vpn"))
+        self.defaults = (default_interval, default_timeout)
+        self.name = self.probe_name(config)
         self.uri = config.get("management_uri", "http://localhost")
         self.interval = int(config.get("interval", default_interval))
         self.timeout = float(config.get("timeout", default_timeout))
@@ -77,81 +147,225 @@ class VpnProbe(threading.Thread):
         self.expected_status = int(config.get("expected_status", 200))
         self.username = config.get("scrape_user")
         self.password = config.get("scrape_password")
-        self._stop_event = threading.Event()
+        self.stopped = False
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        if self.username and self.password:
+            self._session.auth = HTTPBasicAuth(self.username, self.password)
+        self._session.verify = self.verify_ssl
+        self._m_success = SUCCESS_GAUGE.labels(name=self.name)
+        self._m_duration = DURATION_GAUGE.labels(name=self.name)
+        self._m_status_code = STATUS_CODE_GAUGE.labels(name=self.name)
+        self._m_state = STATE_ENUM.labels(name=self.name)
+        self._m_results = {
+            reason: RESULT_COUNTER.labels(name=self.name, reason=reason) for reason in RESULT_REASONS
+        }
+        self._m_message = MESSAGE_INFO.labels(name=self.name) if MESSAGE_INFO is not None else None
+        self._m_last_run = LAST_RUN_GAUGE.labels(name=self.name)
+        TARGET_INFO.labels(name=self.name).info({"uri": self.uri})
+        LOGGER.info("Starting VPN probe for %s (%s)", self.name, self.uri)
 
-    def stop(self) -> None:
-        self._stop_event.set()
+    @staticmethod
+    def probe_name(config: Dict[str, Any]) -> str:
+        return config.get("name", config.get("management_uri", "vpn"))
 
-    def run(self) -> None:
-        LOGGER.info("Starting VPN probe for %s (%s)", self.name, self.uri)
-        while not self._stop_event.is_set():
-            self._execute_probe()
-            self._stop_event.wait(self.interval)
+    def close(self, *, keep_series: bool = False) -> None:
+        # Drop this probe's series so removed or renamed targets stop being exported,
+        # unless a replacement probe with the same name already owns them.
+        if not keep_series:
+            for metric in PROBE_METRICS:
+                try:
+                    metric.remove(self.name)
+                except KeyError:
+                    pass
+            for reason in RESULT_REASONS:
+                try:
+                    RESULT_COUNTER.remove(self.name, reason)
+                except KeyError:
+                    pass
+        self._session.close()
 
-    def _execute_probe(self) -> None:
-        labels = {"name": self.name, "uri": self.uri}
+    def run_once(self) -> None:
         start_time = time.perf_counter()
         success = False
         message = ""
         status_code = 0
+        reason = "error"
         try:
             response = self._perform_request()
             status_code = response.status_code
             success = status_code == self.expected_status
             if success:
                 state = "ok"
+                reason = "ok"
                 message = f"HTTP {status_code}"
             else:
                 state = "degraded"
+                reason = "unexpected"
                 message = f"Unexpected status code {status_code}"
         except Exception as exc:  # pylint: disable=broad-except
             state = "error"
+            reason = classify_error(exc)
             message = f"Probe error: {exc}"
             LOGGER.warning("VPN probe %s failed: %s", self.name, exc)
         finally:
             duration = time.perf_counter() - start_time
-            SUCCESS_GAUGE.labels(**labels).set(1 if success else 0)
-            DURATION_GAUGE.labels(**labels).set(duration)
-            STATUS_CODE_GAUGE.labels(**labels).set(status_code)
-            STATE_ENUM.labels(**labels).state(state)
-            MESSAGE_INFO.labels(**labels).info({"message": message or ("success" if success else "failure")})
-            LAST_RUN_GAUGE.labels(**labels).set(time.time())
+            self._m_success.set(1 if success else 0)
+            self._m_duration.set(duration)
+            self._m_status_code.set(status_code)
+            self._m_state.state(state)
+            self._m_results[reason].inc()
+            if self._m_message is not None:
+                self._m_message.info({"message": message or ("success" if success else "failure")})
+            self._m_last_run.set(time.time())
             LOGGER.debug("VPN probe %s completed in %.3fs: %s", self.name, duration, message)
 
     def _perform_request(self) -> requests.Response:
-        auth = HTTPBasicAuth(self.username, self.password) if self.username and self.password else None
-        return requests.get(
-            self.uri,
-            timeout=self.timeout,
-            auth=auth,
-            verify=self.verify_ssl,
-        )
+        # Pooled session keeps the TCP/TLS connection alive between probes.
+        return self._session.get(self.uri, timeout=self.timeout)
 
 
-def main() -> None:
-    config = load_config(CONFIG_PATH)
+class ProbeScheduler:
+    """Run probes from a single timer thread on a bounded worker pool."""
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="vpn-probe")
+        self._heap: List[Tuple[float, int, VpnProbe]] = []
+        self._sequence = itertools.count()
+        self._in_flight: Set[VpnProbe] = set()
+        # Registered probes by name, so a deferred close can tell it has been replaced.
+        self._live: Dict[str, VpnProbe] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="vpn-scheduler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def add(self, probe: VpnProbe) -> None:
+        with self._cond:
+            self._live[probe.name] = probe
+            self._push(probe, time.monotonic())
+
+    def remove(self, probe: VpnProbe) -> None:
+        with self._cond:
+            probe.stopped = True
+            if self._live.get(probe.name) is probe:
+                del self._live[probe.name]
+            busy = probe in self._in_flight
+        # A probe that is mid-run is closed by _finish once it returns.
+        if not busy:
+            self._close(probe)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _push(self, probe: VpnProbe, due: float) -> None:
+        # The sequence number breaks ties so probes themselves are never compared.
+        heapq.heappush(self._heap, (due, next(self._sequence), probe))
+        self._cond.notify()
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._closed:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, probe = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if probe.stopped:
+                    continue
+                self._in_flight.add(probe)
+                future = self._executor.submit(probe.run_once)
+                future.add_done_callback(lambda _future, probe=probe: self._finish(probe))
+
+    def _finish(self, probe: VpnProbe) -> None:
+        with self._cond:
+            self._in_flight.discard(probe)
+            stopped = probe.stopped
+            if not stopped and not self._closed:
+                # Each probe is in flight at most once; the next run is due an interval after this one ends.
+                self._push(probe, time.monotonic() + probe.interval)
+        if stopped:
+            self._close(probe)
+
+    def _close(self, probe: VpnProbe) -> None:
+        # A reload may register a replacement under the same name while this probe is
+        # still running; the replacement shares its label children, so keep them.
+        with self._cond:
+            replaced = probe.name in self._live
+        probe.close(keep_series=replaced)
+
+
+def _handle_signal(signum: int, _frame: Any) -> None:
+    if signum == signal.SIGHUP:
+        RELOAD.set()
+    else:
+        SHUTDOWN.set()
+    _WAKE.set()
+
+
+def sync_probes(scheduler: ProbeScheduler, probes: Dict[str, VpnProbe], config: Dict[str, Any]) -> None:
+    """Start, restart, or stop probes so they match the configured targets."""
     interval = int(config.get("interval", DEFAULT_INTERVAL))
     timeout = float(config.get("timeout", DEFAULT_TIMEOUT))
-    probes: List[VpnProbe] = []
-
+    desired: Dict[str, Dict[str, Any]] = {}
     for target in config.get("targets", []):
         if not target.get("management_uri"):
             LOGGER.warning("Skipping VPN target without management_uri: %s", target)
             continue
-        probe = VpnProbe(target, interval, timeout)
-        probe.start()
-        probes.append(probe)
+        desired[VpnProbe.probe_name(target)] = target
+
+    for name, probe in list(probes.items()):
+        if desired.get(name) != probe.config or probe.defaults != (interval, timeout):
+            scheduler.remove(probe)
+            del probes[name]
+    for name, target in desired.items():
+        if name not in probes:
+            probe = VpnProbe(target, interval, timeout)
+            scheduler.add(probe)
+            probes[name] = probe
+
+
+def main() -> None:
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, _handle_signal)
+
+    probes: Dict[str, VpnProbe] = {}
+    scheduler = ProbeScheduler(DEFAULT_WORKERS)
+    scheduler.start()
+    sync_probes(scheduler, probes, load_config(CONFIG_PATH))
 
     start_http_server(DEFAULT_PORT)
     LOGGER.info("VPN exporter listening on %s", DEFAULT_PORT)
 
-    try:
-        while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
-        LOGGER.info("Stopping VPN exporter")
-        for probe in probes:
-            probe.stop()
+    while True:
+        _WAKE.wait()
+        _WAKE.clear()
+        if SHUTDOWN.is_set():
+            break
+        if RELOAD.is_set():
+            RELOAD.clear()
+            LOGGER.info("Reloading configuration from %s", CONFIG_PATH)
+            try:
+                sync_probes(scheduler, probes, load_config(CONFIG_PATH))
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Configuration reload failed, keeping current probes: %s", exc)
+
+    LOGGER.info("Stopping VPN exporter")
+    scheduler.shutdown()
+    for probe in probes.values():
+        probe.close()
 
 
 if __name__ == "__main__":
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import hashlib
 import hmac
+from typing import Dict, Mapping
 
 
 def extract_bearer(header: str | None) -> str:
@@ -14,7 +16,30 @@ def extract_bearer(header: str | None) -> str:
     return header
 
 
-def constant_time_compare(expected: str | None, received: str | None) -> bool:
+def encode_token(token: str | bytes) -> bytes:
+    if isinstance(token, bytes):
+        return token
+    return token.encode("utf-8")
+
+
+def constant_time_compare(expected: str | bytes | None, received: str | bytes | None) -> bool:
     if expected is None or received is None:
         return False
-    return hmac.compare_digest(expected, received)
+    return hmac.compare_digest(encode_token(expected), encode_token(received))
+
+
+def token_digest(token: str | bytes) -> bytes:
+    return hashlib.sha256(encode_token(token)).digest()
+
+
+def digest_tokens(tokens: Mapping[str, str | bytes] | None) -> Dict[str, bytes]:
+    """Hash expected tokens once so handshakes compare fixed 32-byte digests,
+    which also keeps the comparison from leaking the expected token's length."""
+
+    return {key: token_digest(value) for key, value in (tokens or {}).items()}
+
+
+def verify_token_digest(expected_digest: bytes | None, received: str | bytes | None) -> bool:
+    if expected_digest is None or received is None:
+        return False
+    return hmac.compare_digest(expected_digest, token_digest(received))
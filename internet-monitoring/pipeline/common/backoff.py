@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import random
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -14,6 +14,8 @@ class ExponentialBackoff:
     max_interval: float = 30.0
     jitter: float = 0.1
     _current: float = 0.0
+    # Private generator: avoids the shared module-level Random on reconnect storms.
+    _rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)
 
     def reset(self) -> None:
         self._current = 0.0
@@ -24,7 +26,7 @@ class ExponentialBackoff:
         else:
             self._current = min(self._current * self.factor, self.max_interval)
         jitter_delta = self._current * self.jitter
-        return max(0.0, self._current + random.uniform(-jitter_delta, jitter_delta))
+        return max(0.0, self._current + (self._rng.random() * 2.0 - 1.0) * jitter_delta)
 
     def sleep(self) -> None:
         time.sleep(self.next_interval())
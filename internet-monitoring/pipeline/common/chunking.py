@@ -2,21 +2,25 @@
 
 from __future__ import annotations
 
-import gzip
-import math
 import os
 import time
+import zlib
 from dataclasses import dataclass, field
-from hashlib import sha256
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .hashing import DEFAULT_HASH_ALGORITHM, SHA256, digest, new_hasher
 
 
 DEFAULT_CHUNK_SIZE = 128 * 1024  # 128 KiB
 MIN_CHUNK_SIZE = 64 * 1024
 MAX_CHUNK_SIZE = 256 * 1024
 
+# gzip.compress defaults to level 9; level 6 is the zlib sweet spot for telemetry.
+GZIP_LEVEL = 6
+_GZIP_WBITS = 31  # zlib wbits selecting the gzip container
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EventChunk:
     """Representation of a chunk before it receives a persistent sequence number."""
 
@@ -30,6 +34,7 @@ class EventChunk:
     logical_timestamp_ms: int
     clock_skew_ms: float
     attributes: Dict[str, str] = field(default_factory=dict)
+    hash_algorithm: str = SHA256
 
 
 def _validate_chunk_size(chunk_size: int) -> int:
@@ -50,6 +55,7 @@ def chunk_payload(
     logical_timestamp_ms: int | None = None,
     clock_skew_ms: float = 0.0,
     attributes: Dict[str, str] | None = None,
+    hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
 ) -> List[EventChunk]:
     """
     Split payload into compressed chunks with hashing metadata.
@@ -62,50 +68,88 @@ def chunk_payload(
         logical_timestamp_ms: Event time reported by the sensor.
         clock_skew_ms: Estimated sensor clock skew versus server.
         attributes: Optional metadata sent alongside each chunk.
+        hash_algorithm: Digest used for chunk_hash/event_hash ("sha256" or "blake3").
     """
 
     chunk_size = _validate_chunk_size(chunk_size)
+    # memoryview slices are zero-copy; zlib and hashlib accept them directly.
+    view = memoryview(payload)
+    slices = (view[start : start + chunk_size] for start in range(0, len(view), chunk_size))
+    return _build_chunks(
+        slices,
+        event_id,
+        compression=compression,
+        logical_timestamp_ms=logical_timestamp_ms,
+        clock_skew_ms=clock_skew_ms,
+        attributes=attributes,
+        hash_algorithm=hash_algorithm,
+    )
+
+
+def _iter_stream_slices(payloads: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Re-slice an iterable of payload fragments into chunk_size pieces."""
+
+    buffer = bytearray()
+    for fragment in payloads:
+        buffer.extend(fragment)
+        while len(buffer) >= chunk_size:
+            with memoryview(buffer) as view:
+                piece = bytes(view[:chunk_size])
+            del buffer[:chunk_size]
+            yield piece
+    if buffer:
+        yield bytes(buffer)
+
+
+def _build_chunks(
+    slices: Iterable[bytes | memoryview],
+    event_id: str,
+    *,
+    compression: str,
+    logical_timestamp_ms: int | None,
+    clock_skew_ms: float,
+    attributes: Dict[str, str] | None,
+    hash_algorithm: str,
+) -> List[EventChunk]:
     if compression != "gzip":
         raise ValueError(f"Unsupported compression codec {compression}")
 
     if logical_timestamp_ms is None:
         logical_timestamp_ms = int(time.time() * 1000)
 
-    payload_len = len(payload)
-    event_hash = sha256(payload).digest()
-    chunk_total = max(1, math.ceil(payload_len / chunk_size))
     attributes = dict(attributes or {})
 
-    chunks: List[EventChunk] = []
-    for index in range(chunk_total):
-        start = index * chunk_size
-        end = min(start + chunk_size, payload_len)
-        slice_bytes = payload[start:end]
-        if not slice_bytes:
-            break
-
+    # The event hash is fed slice by slice while each slice is still hot in
+    # cache instead of in a separate pass over the whole payload.
+    event_hasher = new_hasher(hash_algorithm)
+    compressed_chunks: List[Tuple[bytes, bytes]] = []
+    # Slicers never yield empty pieces, so an empty payload produces no chunks.
+    for slice_bytes in slices:
+        event_hasher.update(slice_bytes)
         if compression == "gzip":
-            compressed = gzip.compress(slice_bytes)
+            compressed = zlib.compress(slice_bytes, GZIP_LEVEL, _GZIP_WBITS)
         else:
-            compressed = slice_bytes
-
-        chunk_hash = sha256(compressed).digest()
-        chunks.append(
-            EventChunk(
-                event_id=event_id,
-                chunk_index=index,
-                chunk_count=chunk_total,
-                compression=compression,
-                payload=compressed,
-                chunk_hash=chunk_hash,
-                event_hash=event_hash,
-                logical_timestamp_ms=logical_timestamp_ms,
-                clock_skew_ms=clock_skew_ms,
-                attributes=attributes,
-            )
+            compressed = bytes(slice_bytes)
+        compressed_chunks.append((compressed, digest(hash_algorithm, compressed)))
+
+    chunk_total = len(compressed_chunks)
+    event_hash = event_hasher.digest()
+    return [
+        EventChunk(
+            event_id=event_id,
+            chunk_index=index,
+            chunk_count=chunk_total,
+            compression=compression,
+            payload=compressed,
+            chunk_hash=chunk_hash,
+            event_hash=event_hash,
+            logical_timestamp_ms=logical_timestamp_ms,
+            clock_skew_ms=clock_skew_ms,
+            attributes=attributes,
+            hash_algorithm=hash_algorithm,
         )
-
-    return chunks
+        for index, (compressed, chunk_hash) in enumerate(compressed_chunks)
+    ]
 
 
 def random_event_id() -> str:
@@ -120,18 +164,22 @@ def chunk_payload_from_iter(
     compression: str = "gzip",
     clock_skew_ms: float = 0.0,
     attributes: Dict[str, str] | None = None,
+    hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
 ) -> List[EventChunk]:
     """
     Utility for chunking concatenated payload streams with a single event id.
+
+    Fragments are re-sliced as they arrive so the concatenated payload is
+    never materialized in full.
     """
 
-    event_id = random_event_id()
-    combined = b"".join(payloads)
-    return chunk_payload(
-        combined,
-        event_id,
-        chunk_size=chunk_size,
+    chunk_size = _validate_chunk_size(chunk_size)
+    return _build_chunks(
+        _iter_stream_slices(payloads, chunk_size),
+        random_event_id(),
         compression=compression,
+        logical_timestamp_ms=None,
         clock_skew_ms=clock_skew_ms,
         attributes=attributes,
+        hash_algorithm=hash_algorithm,
     )
@@ -0,0 +1,19 @@
+"""Event loop runner that prefers uvloop when it is installed."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is an optional accelerator
+    uvloop = None
+
+T = TypeVar("T")
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    if uvloop is not None:
+        return uvloop.run(main)
+    return asyncio.run(main)
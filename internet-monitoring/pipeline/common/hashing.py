@@ -0,0 +1,28 @@
+"""Digest algorithms used for chunk and event integrity hashes."""
+
+from __future__ import annotations
+
+import hashlib
+
+from blake3 import blake3 as _blake3
+
+SHA256 = "sha256"
+BLAKE3 = "blake3"
+
+# BLAKE3 dispatches to SSE4.1/AVX2/AVX-512/NEON at runtime and outpaces even SHA-NI
+# SHA-256. SHA-256 is still accepted for chunks from older sensors.
+DEFAULT_HASH_ALGORITHM = BLAKE3
+
+
+def new_hasher(algorithm: str):
+    if algorithm == SHA256:
+        return hashlib.sha256()
+    if algorithm == BLAKE3:
+        return _blake3()
+    raise ValueError(f"unsupported hash algorithm {algorithm}")
+
+
+def digest(algorithm: str, data: bytes | memoryview) -> bytes:
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return hasher.digest()
@@ -1,144 +1,102 @@
-"""Wire message representations mirrored from the protobuf schema."""
+"""Wire message representations mirrored from the protobuf schema.
+
+Messages travel as MessagePack so ``bytes`` fields go over the wire raw instead of
+base64, and decoding validates straight into the structs below.
+"""
 
 from __future__ import annotations
 
-import base64
-import dataclasses
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Dict, Iterable, Literal, Optional
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import msgspec
 
 from ..version import PIPELINE_SCHEMA_VERSION
 
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+JSON_CONTENT_TYPE = "application/json"
 
-def _utcnow_iso() -> str:
-    return datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
 
+# Envelopes sent within the same second share one formatted sent_at string.
+_last_sent_at: Tuple[int, str] = (-1, "")
 
-def _to_base64(data: bytes) -> str:
-    return base64.b64encode(data).decode("ascii")
 
-
-def _from_base64(data: str) -> bytes:
-    return base64.b64decode(data.encode("ascii"))
+def _utcnow_iso() -> str:
+    global _last_sent_at
+    now = int(time.time())
+    if now != _last_sent_at[0]:
+        _last_sent_at = (now, time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(now)))
+    return _last_sent_at[1]
 
 
-@dataclass
-class Heartbeat:
+# Control bodies hold only scalars and int lists, so they skip GC tracking entirely.
+class Heartbeat(msgspec.Struct, frozen=True, gc=False, tag="heartbeat", tag_field="body_type"):
     software_version: str
     last_committed_sequence: int
     queue_depth: int
     clock_skew_ms: float
 
-    def to_dict(self) -> dict:
-        return dataclasses.asdict(self)
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "Heartbeat":
-        return cls(**data)
-
-
-@dataclass
-class ChunkRequest:
+class ChunkRequest(msgspec.Struct, frozen=True, gc=False, tag="chunk_request", tag_field="body_type"):
     since_sequence: int
     max_chunks: int
     max_bytes: int
     window_id: str
     max_in_flight: int
 
-    def to_dict(self) -> dict:
-        return dataclasses.asdict(self)
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "ChunkRequest":
-        return cls(**data)
 
-
-@dataclass
-class ChunkAck:
+class ChunkAck(msgspec.Struct, frozen=True, gc=False, tag="chunk_ack", tag_field="body_type"):
     window_id: str
-    committed_sequences: Iterable[int]
+    committed_sequences: List[int]
     reset_window: bool = False
-
-    def to_dict(self) -> dict:
-        return {
-            "window_id": self.window_id,
-            "committed_sequences": list(self.committed_sequences),
-            "reset_window": self.reset_window,
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "ChunkAck":
-        return cls(
-            window_id=data["window_id"],
-            committed_sequences=list(data.get("committed_sequences", [])),
-            reset_window=bool(data.get("reset_window", False)),
-        )
-
-
-@dataclass
-class CommandResponse:
+    # (start, length) runs of contiguous sequences, sent instead of the list when shorter.
+    committed_runs: List[Tuple[int, int]] = msgspec.field(default_factory=list)
+
+    def sequences(self) -> Iterator[int]:
+        yield from self.committed_sequences
+        for start, length in self.committed_runs:
+            yield from range(start, start + length)
+
+
+def sequence_runs(sequences: Iterable[int]) -> List[Tuple[int, int]]:
+    """Collapse consecutive ascending sequences into ``(start, length)`` runs."""
+    runs: List[Tuple[int, int]] = []
+    start = length = 0
+    for sequence in sequences:
+        if length and sequence == start + length:
+            length += 1
+            continue
+        if length:
+            runs.append((start, length))
+        start, length = sequence, 1
+    if length:
+        runs.append((start, length))
+    return runs
+
+
+class CommandResponse(msgspec.Struct, frozen=True, gc=False, tag="command_response", tag_field="body_type"):
     command_id: str
     success: bool
     message: str
 
-    def to_dict(self) -> dict:
-        return dataclasses.asdict(self)
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "CommandResponse":
-        return cls(**data)
-
 
-ControlBody = Literal["heartbeat", "chunk_request", "chunk_ack", "command_response"]
+ControlBody = Union[Heartbeat, ChunkRequest, ChunkAck, CommandResponse]
 
 
-@dataclass
-class ControlEnvelope:
+class ControlEnvelope(msgspec.Struct, frozen=True):
     sensor_id: str
-    body_type: ControlBody
-    body: Heartbeat | ChunkRequest | ChunkAck | CommandResponse
-    sent_at: str | None = None
-    capabilities: Optional[Iterable[str]] = None
+    body: ControlBody
+    sent_at: str = msgspec.field(default_factory=_utcnow_iso)
+    capabilities: List[str] = msgspec.field(default_factory=list)
     schema_version: str = PIPELINE_SCHEMA_VERSION
 
-    def to_dict(self) -> dict:
-        payload = self.body.to_dict()
-        return {
-            "schema_version": self.schema_version,
-            "sensor_id": self.sensor_id,
-            "sent_at": self.sent_at or _utcnow_iso(),
-            "capabilities": list(self.capabilities or []),
-            "body_type": self.body_type,
-            "body": payload,
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "ControlEnvelope":
-        body_type = data["body_type"]
-        body_data = data["body"]
-        if body_type == "heartbeat":
-            body = Heartbeat.from_dict(body_data)
-        elif body_type == "chunk_request":
-            body = ChunkRequest.from_dict(body_data)
-        elif body_type == "chunk_ack":
-            body = ChunkAck.from_dict(body_data)
-        elif body_type == "command_response":
-            body = CommandResponse.from_dict(body_data)
-        else:
-            raise ValueError(f"Unknown control body_type={body_type}")
-        return cls(
-            sensor_id=data["sensor_id"],
-            body_type=body_type,
-            body=body,
-            sent_at=data.get("sent_at"),
-            capabilities=data.get("capabilities"),
-            schema_version=data.get("schema_version", PIPELINE_SCHEMA_VERSION),
-        )
-
-
-@dataclass
-class DataChunk:
+    @property
+    def body_type(self) -> str:
+        return self.body.__struct_config__.tag
+
+
+class DataChunk(msgspec.Struct, frozen=True):
     sensor_id: str
     event_id: str
     sequence: int
@@ -153,40 +111,81 @@ class DataChunk:
     clock_skew_ms: float
     attributes: Dict[str, str]
     schema_version: str = PIPELINE_SCHEMA_VERSION
+    # Names the digest behind chunk_sha256/event_sha256; senders that omit it used SHA-256.
+    hash_algorithm: str = "sha256"
+
+
+_ENCODER = msgspec.msgpack.Encoder()
+_ENVELOPE_DECODER = msgspec.msgpack.Decoder(ControlEnvelope)
+_CHUNK_DECODER = msgspec.msgpack.Decoder(DataChunk)
+_CHUNK_BATCH_DECODER = msgspec.msgpack.Decoder(List[DataChunk])
+# Sensors predating MessagePack post JSON with base64 bytes, which msgspec.json decodes natively.
+_JSON_CHUNK_DECODER = msgspec.json.Decoder(DataChunk)
+# Random bin value marking where EnvelopeEncoder splices in the encoded body.
+_BODY_MARKER = _ENCODER.encode(os.urandom(16))
+
+
+def encode_envelope(envelope: ControlEnvelope) -> bytes:
+    return _ENCODER.encode(envelope)
+
+
+def decode_envelope(data: bytes) -> ControlEnvelope:
+    return _ENVELOPE_DECODER.decode(data)
+
+
+class EnvelopeEncoder:
+    """Encodes envelopes for one sensor, reusing the bytes around the body.
+
+    Everything but the body is invariant for a session apart from ``sent_at``, which
+    only changes once per second, so each send encodes just the body and splices it in.
+    """
+
+    def __init__(self, sensor_id: str, capabilities: Optional[List[str]] = None) -> None:
+        self._sensor_id = sensor_id
+        self._capabilities = list(capabilities or [])
+        self._sent_at = ""
+        self._prefix = b""
+        self._suffix = b""
+
+    def encode(self, body: ControlBody) -> bytes:
+        return self.frame(encode_body(body))
+
+    def frame(self, body: bytes) -> bytes:
+        """Wrap an already encoded body (see ``encode_body``) in this sensor's envelope."""
+        sent_at = _utcnow_iso()
+        if sent_at != self._sent_at:
+            template = _ENCODER.encode(
+                ControlEnvelope(
+                    sensor_id=self._sensor_id,
+                    body=msgspec.Raw(_BODY_MARKER),  # type: ignore[arg-type]
+                    sent_at=sent_at,
+                    capabilities=self._capabilities,
+                )
+            )
+            self._prefix, _, self._suffix = template.partition(_BODY_MARKER)
+            self._sent_at = sent_at
+        return b"".join((self._prefix, body, self._suffix))
+
+
+def encode_body(body: ControlBody) -> bytes:
+    return _ENCODER.encode(body)
+
+
+def encode_chunk(chunk: DataChunk) -> bytes:
+    return _ENCODER.encode(chunk)
+
+
+def encode_chunk_batch(chunks: Sequence[DataChunk]) -> bytes:
+    # A MessagePack array frames each chunk itself, so no length prefixes are needed.
+    return _ENCODER.encode(chunks)
+
+
+def decode_chunk_batch(data: bytes) -> List[DataChunk]:
+    return _CHUNK_BATCH_DECODER.decode(data)
+
 
-    def to_dict(self) -> dict:
-        return {
-            "schema_version": self.schema_version,
-            "sensor_id": self.sensor_id,
-            "event_id": self.event_id,
-            "sequence": self.sequence,
-            "chunk_index": self.chunk_index,
-            "chunk_count": self.chunk_count,
-            "compression": self.compression,
-            "payload": _to_base64(self.payload),
-            "chunk_sha256": _to_base64(self.chunk_sha256),
-            "event_sha256": _to_base64(self.event_sha256),
-            "created_at": self.created_at,
-            "logical_timestamp_ms": self.logical_timestamp_ms,
-            "clock_skew_ms": self.clock_skew_ms,
-            "attributes": self.attributes,
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "DataChunk":
-        return cls(
-            schema_version=data.get("schema_version", PIPELINE_SCHEMA_VERSION),
-            sensor_id=data["sensor_id"],
-            event_id=data["event_id"],
-            sequence=int(data["sequence"]),
-            chunk_index=int(data["chunk_index"]),
-            chunk_count=int(data["chunk_count"]),
-            compression=data["compression"],
-            payload=_from_base64(data["payload"]),
-            chunk_sha256=_from_base64(data["chunk_sha256"]),
-            event_sha256=_from_base64(data["event_sha256"]),
-            created_at=data["created_at"],
-            logical_timestamp_ms=int(data["logical_timestamp_ms"]),
-            clock_skew_ms=float(data["clock_skew_ms"]),
-            attributes=dict(data.get("attributes", {})),
-        )
+def decode_chunk(data: bytes, content_type: Optional[str] = None) -> DataChunk:
+    media_type = (content_type or MSGPACK_CONTENT_TYPE).split(";", 1)[0].strip().lower()
+    if media_type == JSON_CONTENT_TYPE:
+        return _JSON_CHUNK_DECODER.decode(data)
+    return _CHUNK_DECODER.decode(data)
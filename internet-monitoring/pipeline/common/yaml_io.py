@@ -0,0 +1,16 @@
+"""YAML loading helpers that prefer the libyaml C loader when available."""
+
+from __future__ import annotations
+
+from typing import IO, Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader
+
+
+def safe_load(stream: IO[str] | str) -> Any:
+    return yaml.load(stream, Loader=SafeLoader)
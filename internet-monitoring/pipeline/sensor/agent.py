@@ -5,7 +5,8 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
-from typing import Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional
 
 from ..common.backoff import ExponentialBackoff
 from ..common.messages import (
@@ -37,6 +38,8 @@ class SensorAgent:
         heartbeat_interval: float = 30.0,
         capabilities: Optional[Iterable[str]] = None,
         clock_skew: Optional[ClockSkewEstimator] = None,
+        batch_max_chunks: int = 64,
+        batch_max_bytes: int = 4 * 1024 * 1024,
     ) -> None:
         self._sensor_id = sensor_id
         self._dispatcher = dispatcher
@@ -47,11 +50,18 @@ class SensorAgent:
         self._heartbeat_interval = heartbeat_interval
         self._capabilities = list(capabilities or ["chunks", "heartbeats"])
         self._clock_skew = clock_skew or ClockSkewEstimator(enabled=False)
+        self._batch_max_chunks = batch_max_chunks
+        self._batch_max_bytes = batch_max_bytes
         self._backoff = ExponentialBackoff()
         self._stop_event = asyncio.Event()
+        # A single worker keeps dispatcher state single-threaded while SQLite reads
+        # and chunk construction stay off the event loop.
+        self._dispatch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sensor-dispatch")
+        self._heartbeat_handle: Optional[asyncio.TimerHandle] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
 
     async def run(self) -> None:
-        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        self._schedule_heartbeat()
         handshake_pending = True
         try:
             while not self._stop_event.is_set():
@@ -70,20 +80,28 @@ class SensorAgent:
                 await self._handle_control(envelope)
         finally:
             self._stop_event.set()
-            heartbeat_task.cancel()
-            with contextlib.suppress(Exception):
-                await heartbeat_task
+            self._cancel_heartbeat()
+            if self._heartbeat_task is not None:
+                self._heartbeat_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await self._heartbeat_task
             await self._control.close()
+            # Let in-flight queue work finish before the caller closes the queue.
+            await asyncio.get_running_loop().run_in_executor(None, self._dispatch_pool.shutdown)
 
     async def shutdown(self) -> None:
         self._stop_event.set()
+        self._cancel_heartbeat()
         await self._control.close()
 
     async def _handle_control(self, envelope: ControlEnvelope) -> None:
         if envelope.body_type == "chunk_request":
             await self._handle_chunk_request(envelope.body)  # type: ignore[arg-type]
         elif envelope.body_type == "chunk_ack":
-            stats = self._dispatcher.handle_ack(envelope.body)  # type: ignore[arg-type]
+            # The ack's DELETE and depth count hit SQLite, so they share the dispatch worker.
+            stats = await asyncio.get_running_loop().run_in_executor(
+                self._dispatch_pool, self._dispatcher.handle_ack, envelope.body
+            )
             LOGGER.debug("ack processed %s", stats)
         elif envelope.body_type == "heartbeat":
             LOGGER.debug("received server heartbeat %s", envelope.body)
@@ -93,7 +111,10 @@ class SensorAgent:
             LOGGER.warning("unknown control body %s", envelope.body_type)
 
     async def _handle_chunk_request(self, request: ChunkRequest) -> None:
-        chunks = self._dispatcher.build_chunks(request)
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(
+            self._dispatch_pool, self._dispatcher.build_chunks, request
+        )
         if not chunks:
             LOGGER.debug(
                 "no chunks for request window=%s since=%d",
@@ -101,9 +122,45 @@ class SensorAgent:
                 request.since_sequence,
             )
             return
+        if getattr(self._chunk_sender, "supports_bulk", False):
+            for batch in self._batches(chunks):
+                await self._send_batch_with_backoff(batch)
+            return
         for chunk in chunks:
             await self._send_chunk_with_backoff(chunk)
 
+    def _batches(self, chunks: List[DataChunk]) -> Iterator[List[DataChunk]]:
+        batch: List[DataChunk] = []
+        batch_bytes = 0
+        for chunk in chunks:
+            size = len(chunk.payload)
+            if batch and (
+                len(batch) >= self._batch_max_chunks
+                or batch_bytes + size > self._batch_max_bytes
+            ):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(chunk)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    async def _send_batch_with_backoff(self, batch: List[DataChunk]) -> None:
+        backoff = ExponentialBackoff()
+        while True:
+            try:
+                await self._chunk_sender.send_chunks(batch)  # type: ignore[attr-defined]
+                return
+            except Exception as exc:
+                LOGGER.warning(
+                    "failed to send %d chunks from seq=%d retrying: %s",
+                    len(batch),
+                    batch[0].sequence,
+                    exc,
+                )
+                await asyncio.sleep(backoff.next_interval())
+
     async def _send_chunk_with_backoff(self, chunk: DataChunk) -> None:
         backoff = ExponentialBackoff()
         while True:
@@ -118,27 +175,35 @@ class SensorAgent:
                 )
                 await asyncio.sleep(backoff.next_interval())
 
-    async def _heartbeat_loop(self) -> None:
-        while not self._stop_event.is_set():
-            await self._send_heartbeat()
-            try:
-                await asyncio.wait_for(
-                    self._stop_event.wait(), timeout=self._heartbeat_interval
-                )
-            except asyncio.TimeoutError:
-                continue
+    def _schedule_heartbeat(self) -> None:
+        # A self-rearming timer avoids a wait_for future and TimeoutError per interval.
+        if self._stop_event.is_set():
+            return
+        loop = asyncio.get_running_loop()
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = loop.create_task(self._send_heartbeat())
+        self._heartbeat_handle = loop.call_later(
+            self._heartbeat_interval, self._schedule_heartbeat
+        )
+
+    def _cancel_heartbeat(self) -> None:
+        if self._heartbeat_handle is not None:
+            self._heartbeat_handle.cancel()
+            self._heartbeat_handle = None
 
     async def _send_heartbeat(self) -> None:
         skew = self._clock_skew.estimate()
+        queue_depth = await asyncio.get_running_loop().run_in_executor(
+            self._dispatch_pool, self._dispatcher.queue_depth
+        )
         heartbeat = Heartbeat(
             software_version=self._software_version,
             last_committed_sequence=self._dispatcher.last_ack_sequence,
-            queue_depth=self._dispatcher.queue_depth(),
+            queue_depth=queue_depth,
             clock_skew_ms=skew,
         )
         envelope = ControlEnvelope(
             sensor_id=self._sensor_id,
-            body_type="heartbeat",
             body=heartbeat,
             capabilities=self._capabilities,
             schema_version=PIPELINE_SCHEMA_VERSION,
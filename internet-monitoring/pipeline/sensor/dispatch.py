@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from ..common.messages import ChunkAck, ChunkRequest, DataChunk
 from ..version import PIPELINE_SCHEMA_VERSION
@@ -25,6 +25,8 @@ class ChunkDispatcher:
         self._windows: Dict[str, WindowState] = {}
         self._in_flight: Dict[int, str] = {}
         self._last_ack_sequence: int = 0
+        # Chunks of one burst share created_at seconds, so reuse the last formatted value.
+        self._last_created: Tuple[int, str] = (-1, "")
 
     @property
     def last_ack_sequence(self) -> int:
@@ -33,21 +35,20 @@ class ChunkDispatcher:
     def queue_depth(self) -> int:
         return self._queue.queue_depth()
 
-    def _track_window(self, window_id: str, sequence: int) -> None:
-        state = self._windows.setdefault(window_id, WindowState(window_id=window_id))
-        state.sequences.add(sequence)
-        self._in_flight[sequence] = window_id
-
-    def _release_sequence(self, sequence: int) -> None:
-        window_id = self._in_flight.pop(sequence, None)
-        if not window_id:
-            return
-        window = self._windows.get(window_id)
-        if not window:
-            return
-        window.sequences.discard(sequence)
-        if not window.sequences:
-            self._windows.pop(window_id, None)
+    def _release_sequences(self, sequences: Iterable[int]) -> None:
+        # Group by window so each window drops its acked sequences in one set difference.
+        released: Dict[str, List[int]] = {}
+        for sequence in sequences:
+            window_id = self._in_flight.pop(sequence, None)
+            if window_id:
+                released.setdefault(window_id, []).append(sequence)
+        for window_id, window_sequences in released.items():
+            window = self._windows.get(window_id)
+            if not window:
+                continue
+            window.sequences.difference_update(window_sequences)
+            if not window.sequences:
+                self._windows.pop(window_id, None)
 
     def build_chunks(self, request: ChunkRequest) -> List[DataChunk]:
         records = self._queue.peek_window(
@@ -56,28 +57,41 @@ class ChunkDispatcher:
             max_bytes=request.max_bytes,
         )
         to_send: List[DataChunk] = []
+        # Hoist per-request lookups out of the per-record loop.
+        in_flight = self._in_flight
+        window_id = request.window_id
+        max_in_flight = request.max_in_flight
+        window: Optional[WindowState] = None
         for record in records:
-            if (
-                record.sequence in self._in_flight
-                and self._in_flight[record.sequence] != request.window_id
-            ):
+            sequence = record.sequence
+            tracked_by = in_flight.get(sequence)
+            if tracked_by is not None and tracked_by != window_id:
                 # Already being tracked by a different window; let the server
                 # resolve via retry/ack before resending.
                 continue
 
-            if request.max_in_flight > 0 and len(self._in_flight) >= request.max_in_flight:
+            if max_in_flight > 0 and len(in_flight) >= max_in_flight:
                 break
 
             chunk = self._to_data_chunk(record)
-            chunk.attributes["window_id"] = request.window_id
+            chunk.attributes["window_id"] = window_id
             to_send.append(chunk)
-            self._track_window(request.window_id, record.sequence)
+            if window is None:
+                window = self._windows.setdefault(window_id, WindowState(window_id=window_id))
+            window.sequences.add(sequence)
+            in_flight[sequence] = window_id
         return to_send
 
     def _to_data_chunk(self, record: QueuedChunk) -> DataChunk:
-        created_iso = time.strftime(
-            "%Y-%m-%dT%H:%M:%SZ", time.gmtime(record.created_at)
-        )
+        created_second = int(record.created_at)
+        if created_second != self._last_created[0]:
+            self._last_created = (
+                created_second,
+                time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(created_second)),
+            )
+        # peek_window decodes a fresh dict per record, so it can be trimmed in place.
+        attributes = record.attributes
+        attributes.pop("schema_version_override", None)
         return DataChunk(
             schema_version=PIPELINE_SCHEMA_VERSION,
             sensor_id=self._sensor_id,
@@ -89,24 +103,28 @@ class ChunkDispatcher:
             payload=record.payload,
             chunk_sha256=record.chunk_hash,
             event_sha256=record.event_hash,
-            created_at=created_iso,
+            created_at=self._last_created[1],
             logical_timestamp_ms=record.logical_timestamp_ms,
             clock_skew_ms=record.clock_skew_ms,
-            attributes={
-                k: v
-                for k, v in record.attributes.items()
-                if k != "schema_version_override"
-            },
+            attributes=attributes,
+            hash_algorithm=record.hash_algorithm,
         )
 
     def handle_ack(self, ack: ChunkAck) -> Dict[str, int]:
-        deleted = 0
-        committed_sequences = sorted(set(int(seq) for seq in ack.committed_sequences))
         if ack.reset_window:
             self._windows.pop(ack.window_id, None)
-        deleted = self._queue.delete_sequences(committed_sequences)
-        for seq in committed_sequences:
-            self._release_sequence(seq)
-        if committed_sequences:
-            self._last_ack_sequence = max(self._last_ack_sequence, committed_sequences[-1])
+        # One pass dedups and tracks the max; DELETE needs no ordering.
+        seen: Set[int] = set()
+        committed: List[int] = []
+        last_ack = self._last_ack_sequence
+        for seq in ack.sequences():
+            if seq in seen:
+                continue
+            seen.add(seq)
+            committed.append(seq)
+            if seq > last_ack:
+                last_ack = seq
+        self._release_sequences(committed)
+        deleted = self._queue.delete_sequences(committed)
+        self._last_ack_sequence = last_ack
         return {"deleted": deleted, "remaining": self._queue.queue_depth()}
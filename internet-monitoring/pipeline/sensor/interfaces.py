@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import abc
-from typing import Awaitable, Protocol
+from typing import Awaitable, Protocol, Sequence
 
 from ..common.messages import ControlEnvelope, DataChunk
 
@@ -22,3 +22,12 @@ class ControlChannel(Protocol):
 class ChunkSender(Protocol):
     async def send_chunk(self, chunk: DataChunk) -> None:
         ...
+
+
+class BulkChunkSender(ChunkSender, Protocol):
+    @property
+    def supports_bulk(self) -> bool:
+        ...
+
+    async def send_chunks(self, chunks: Sequence[DataChunk]) -> None:
+        ...
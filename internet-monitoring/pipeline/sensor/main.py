@@ -11,7 +11,8 @@ import ssl
 from pathlib import Path
 from typing import Any, Dict
 
-import yaml
+from ..common import event_loop
+from ..common.yaml_io import safe_load
 from .agent import SensorAgent
 from .dispatch import ChunkDispatcher
 from .queue import DurableQueue
@@ -23,7 +24,7 @@ LOGGER = logging.getLogger("pipeline.sensor")
 
 def load_config(path: Path) -> Dict[str, Any]:
     with path.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle)
+        data = safe_load(handle)
     if not isinstance(data, dict):
         raise ValueError("configuration must be a mapping")
     return data
@@ -68,10 +69,13 @@ async def run_agent(config: Dict[str, Any]) -> None:
     ingest_headers = dict(ingest_cfg.get("headers", {}))
     if token:
         ingest_headers.setdefault("Authorization", f"Bearer {token}")
-    ingest_headers.setdefault("Content-Type", "application/json")
 
     control_ssl = build_client_ssl(control_cfg)
-    ingest_ssl = build_client_ssl(ingest_cfg)
+    # Identical TLS settings share one context and its certificate state.
+    if ingest_cfg.get("tls") == control_cfg.get("tls"):
+        ingest_ssl = control_ssl
+    else:
+        ingest_ssl = build_client_ssl(ingest_cfg)
 
     control_channel = WebsocketControlChannel(
         control_cfg["url"],
@@ -86,6 +90,7 @@ async def run_agent(config: Dict[str, Any]) -> None:
         timeout=float(ingest_cfg.get("timeout", 10.0)),
         headers=ingest_headers,
         ssl_context=ingest_ssl,
+        bulk_path=ingest_cfg.get("bulk_path"),
     )
 
     heartbeat_interval = float(config.get("heartbeat_interval", 30.0))
@@ -96,6 +101,7 @@ async def run_agent(config: Dict[str, Any]) -> None:
         enabled=bool(time_sync_cfg.get("enabled", False)),
         ntp_server=time_sync_cfg.get("ntp_server", "pool.ntp.org"),
         fallback_skew_ms=float(time_sync_cfg.get("fallback_skew_ms", 0.0)),
+        sync_interval_seconds=float(time_sync_cfg.get("sync_interval_seconds", 300.0)),
     )
 
     agent = SensorAgent(
@@ -108,6 +114,8 @@ async def run_agent(config: Dict[str, Any]) -> None:
         heartbeat_interval=heartbeat_interval,
         capabilities=capabilities,
         clock_skew=clock_skew,
+        batch_max_chunks=int(ingest_cfg.get("batch_max_chunks", 64)),
+        batch_max_bytes=int(ingest_cfg.get("batch_max_bytes", 4 * 1024 * 1024)),
     )
 
     loop = asyncio.get_running_loop()
@@ -124,6 +132,7 @@ async def run_agent(config: Dict[str, Any]) -> None:
         agent_task.cancel()
         with contextlib.suppress(asyncio.CancelledError):
             await agent_task
+        await chunk_sender.close()
         queue.close()
 
 
@@ -145,7 +154,7 @@ def main() -> None:
 
     config = load_config(Path(args.config))
 
-    asyncio.run(run_agent(config))
+    event_loop.run(run_agent(config))
 
 
 if __name__ == "__main__":
@@ -2,9 +2,18 @@
 
 from __future__ import annotations
 
+import re
 import subprocess
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import ntplib
+except ImportError:  # pragma: no cover - ntplib is optional, ntpdate is the fallback
+    ntplib = None
+
+_NTPDATE_OFFSET_RE = re.compile(rb"offset\s+([-+]?\d+(?:\.\d+)?)\s+msec")
 
 
 @dataclass
@@ -12,30 +21,45 @@ class ClockSkewEstimator:
     fallback_skew_ms: float = 0.0
     ntp_server: str = "pool.ntp.org"
     enabled: bool = True
+    sync_interval_seconds: float = 300.0
     _last_skew_ms: float = 0.0
     _last_sync_epoch: float = 0.0
+    _client: Optional["ntplib.NTPClient"] = field(default=None, repr=False)
 
     def estimate(self) -> float:
         now = time.time()
         if not self.enabled:
             return self.fallback_skew_ms
-        if now - self._last_sync_epoch < 300:
+        if now - self._last_sync_epoch < self.sync_interval_seconds:
             return self._last_skew_ms
         try:
-            output = subprocess.check_output(
-                ["ntpdate", "-q", self.ntp_server],
-                stderr=subprocess.STDOUT,
-                timeout=5,
-            ).decode("utf-8")
-            # Parse "offset x.y msec" from ntpdate output
-            for line in output.splitlines():
-                if "offset" in line and "msec" in line:
-                    parts = line.split()
-                    offset_idx = parts.index("offset")
-                    skew = float(parts[offset_idx + 1])
-                    self._last_skew_ms = skew
-                    self._last_sync_epoch = now
-                    return skew
+            if ntplib is not None:
+                skew = self._query_ntplib()
+            else:
+                skew = self._query_ntpdate()
         except Exception:
-            pass
-        return self.fallback_skew_ms
+            skew = None
+        if skew is None:
+            return self.fallback_skew_ms
+        self._last_skew_ms = skew
+        self._last_sync_epoch = now
+        return skew
+
+    def _query_ntplib(self) -> float:
+        # A single UDP exchange in-process instead of forking ntpdate.
+        if self._client is None:
+            self._client = ntplib.NTPClient()
+        response = self._client.request(self.ntp_server, version=3, timeout=5)
+        return response.offset * 1000.0
+
+    def _query_ntpdate(self) -> Optional[float]:
+        output = subprocess.check_output(
+            ["ntpdate", "-q", self.ntp_server],
+            stderr=subprocess.STDOUT,
+            timeout=5,
+        )
+        # Scan the raw output for "offset x.y msec" in one pass, without decoding.
+        match = _NTPDATE_OFFSET_RE.search(output)
+        if match is None:
+            return None
+        return float(match.group(1))
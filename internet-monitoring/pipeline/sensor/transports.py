@@ -3,15 +3,32 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import http.client
 import ssl
-import urllib.request
-from typing import Dict, Optional
-
-from ..common.messages import ControlEnvelope, DataChunk
+import threading
+import urllib.parse
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from ..common.messages import (
+    MSGPACK_CONTENT_TYPE,
+    ControlEnvelope,
+    DataChunk,
+    decode_envelope,
+    encode_chunk,
+    encode_chunk_batch,
+    encode_envelope,
+)
 from .interfaces import ChunkSender, ControlChannel
 
 
+@lru_cache(maxsize=1)
+def default_client_ssl_context() -> ssl.SSLContext:
+    """Shared verifying client context, so the CA bundle is parsed once per process
+    rather than once per TLS connection when no explicit context is configured."""
+    return ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+
+
 class WebsocketControlChannel(ControlChannel):
     def __init__(
         self,
@@ -24,6 +41,8 @@ class WebsocketControlChannel(ControlChannel):
     ) -> None:
         self._url = url
         self._headers = headers or {}
+        if ssl_context is None and url.startswith("wss:"):
+            ssl_context = default_client_ssl_context()
         self._ssl_context = ssl_context
         self._ping_interval = ping_interval
         self._ping_timeout = ping_timeout
@@ -31,9 +50,11 @@ class WebsocketControlChannel(ControlChannel):
         self._conn_lock = asyncio.Lock()
 
     async def _ensure_connection(self):
+        # Callers check self._conn first; re-check under the lock since another
+        # task may have connected while this one waited.
         async with self._conn_lock:
             if self._conn is not None:
-                return
+                return self._conn
             try:
                 import websockets
             except ModuleNotFoundError as exc:  # pragma: no cover - dependency optional
@@ -46,25 +67,27 @@ class WebsocketControlChannel(ControlChannel):
                 ssl=self._ssl_context,
                 ping_interval=self._ping_interval,
                 ping_timeout=self._ping_timeout,
+                # Envelopes are small binary MessagePack frames; permessage-deflate
+                # would only add a zlib pass per frame.
+                compression=None,
+                max_size=2**20,
             )
+            return self._conn
 
     async def recv(self) -> ControlEnvelope:
-        await self._ensure_connection()
-        assert self._conn is not None
+        conn = self._conn or await self._ensure_connection()
         try:
-            raw = await self._conn.recv()
+            raw = await conn.recv()
         except Exception:
             await self._reset()
             raise
-        return ControlEnvelope.from_dict(json.loads(raw))
+        return decode_envelope(raw)
 
     async def send(self, envelope: ControlEnvelope) -> None:
-        await self._ensure_connection()
-        assert self._conn is not None
-
-        payload = json.dumps(envelope.to_dict())
+        conn = self._conn or await self._ensure_connection()
+        payload = encode_envelope(envelope)
         try:
-            await self._conn.send(payload)
+            await conn.send(payload)
         except Exception:
             await self._reset()
             raise
@@ -76,6 +99,8 @@ class WebsocketControlChannel(ControlChannel):
                 self._conn = None
 
     async def _reset(self) -> None:
+        if self._conn is None:
+            return
         async with self._conn_lock:
             if self._conn is not None:
                 try:
@@ -93,27 +118,93 @@ class HttpChunkSender(ChunkSender):
         timeout: float = 10.0,
         headers: Optional[Dict[str, str]] = None,
         ssl_context: Optional[ssl.SSLContext] = None,
+        bulk_path: Optional[str] = None,
     ) -> None:
+        parsed = urllib.parse.urlsplit(endpoint)
         self._endpoint = endpoint
+        self._scheme = parsed.scheme
+        self._netloc = parsed.netloc
+        self._path = parsed.path or "/"
+        if parsed.query:
+            self._path = f"{self._path}?{parsed.query}"
+        # Servers that expose the bulk route accept a MessagePack array of chunks.
+        self._bulk_path = bulk_path
         self._timeout = timeout
-        self._headers = headers or {"Content-Type": "application/json"}
+        self._headers = {**(headers or {}), "Content-Type": MSGPACK_CONTENT_TYPE}
+        if ssl_context is None and self._scheme == "https":
+            ssl_context = default_client_ssl_context()
         self._ssl_context = ssl_context
+        # Retries resend the same DataChunk object, so the last failed encoding is
+        # reused instead of serializing the payload again on every backoff round.
+        self._pending: Optional[Tuple[object, bytes]] = None
+        # One keep-alive connection is reused across chunks so each POST skips the
+        # TCP and TLS handshakes; the lock serializes its use across worker threads.
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(
+                self._netloc, timeout=self._timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(self._netloc, timeout=self._timeout)
+
+    @property
+    def supports_bulk(self) -> bool:
+        return self._bulk_path is not None
+
+    def _post(self, path: str, payload: bytes) -> int:
+        with self._conn_lock:
+            conn, self._conn = self._conn, None
+            if conn is not None:
+                try:
+                    return self._exchange(conn, path, payload)
+                except ConnectionError:
+                    # The server dropped the idle connection; resend once on a fresh one.
+                    pass
+            return self._exchange(self._connect(), path, payload)
+
+    def _exchange(self, conn: http.client.HTTPConnection, path: str, payload: bytes) -> int:
+        try:
+            conn.request("POST", path, body=payload, headers=self._headers)
+            resp = conn.getresponse()
+            resp.read()
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._conn = conn
+        return resp.status
+
+    def _send(self, path: str, item: object, encode: Callable[[object], bytes]) -> None:
+        # Encoding happens on the worker thread along with the blocking POST.
+        pending = self._pending
+        if pending is not None and pending[0] is item:
+            payload = pending[1]
+        else:
+            payload = encode(item)
+            self._pending = (item, payload)
+        status = self._post(path, payload)
+        if status >= 300:
+            raise RuntimeError(f"chunk post failed status={status}")
+        self._pending = None
 
     async def send_chunk(self, chunk: DataChunk) -> None:
-        payload = json.dumps(chunk.to_dict()).encode("utf-8")
-
-        def _send():
-            request = urllib.request.Request(
-                self._endpoint,
-                data=payload,
-                headers=self._headers,
-                method="POST",
-            )
-            with urllib.request.urlopen(
-                request, timeout=self._timeout, context=self._ssl_context
-            ) as resp:
-                status = getattr(resp, "status", resp.getcode())
-                if status >= 300:
-                    raise RuntimeError(f"chunk post failed status={status}")
-
-        await asyncio.to_thread(_send)
+        await asyncio.to_thread(self._send, self._path, chunk, encode_chunk)
+
+    async def send_chunks(self, chunks: Sequence[DataChunk]) -> None:
+        """POST several chunks at once; requires ``bulk_path``."""
+        if self._bulk_path is None:
+            raise RuntimeError("bulk uploads need a bulk_path")
+        await asyncio.to_thread(self._send, self._bulk_path, chunks, encode_chunk_batch)
+
+    async def close(self) -> None:
+        def _close():
+            with self._conn_lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+        await asyncio.to_thread(_close)
@@ -1,7 +1,7 @@
 """Server-side reference implementation for the delivery pipeline."""
 
 from .control import ControlManager, control_server
-from .http_ingest import ChunkIngestService, create_server
+from .http_ingest import ChunkIngestService, create_app, start_server
 from .dashboard_api import build_dashboard_payload
 from .scheduler import RequestScheduler
 from .snapshot_cache import SnapshotCache
@@ -12,7 +12,8 @@ __all__ = [
     "ControlManager",
     "control_server",
     "ChunkIngestService",
-    "create_server",
+    "create_app",
+    "start_server",
     "build_dashboard_payload",
     "RequestScheduler",
     "SnapshotCache",
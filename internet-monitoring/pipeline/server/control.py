@@ -3,25 +3,47 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
-from dataclasses import dataclass
-from typing import Awaitable, Callable, Dict, Iterable, Mapping, Optional
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 
-from ..common.auth import constant_time_compare, extract_bearer
-from ..common.messages import ChunkAck, ChunkRequest, ControlEnvelope, Heartbeat
-from ..version import PIPELINE_SCHEMA_VERSION
+from ..common.auth import digest_tokens, extract_bearer, verify_token_digest
+from ..common.messages import (
+    ChunkAck,
+    ChunkRequest,
+    ControlBody,
+    ControlEnvelope,
+    EnvelopeEncoder,
+    Heartbeat,
+    decode_envelope,
+    encode_body,
+    encode_envelope,
+    sequence_runs,
+)
 
 LOGGER = logging.getLogger(__name__)
 
+HeartbeatBatchCallback = Callable[[List[Tuple[str, Heartbeat]]], Awaitable[None]]
 
-@dataclass
+
+# One session per connected sensor; slots keep the per-session footprint fixed.
+@dataclass(slots=True)
 class ControlSession:
     sensor_id: str
     websocket: "websockets.WebSocketServerProtocol"
+    _encoder: EnvelopeEncoder = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._encoder = EnvelopeEncoder(self.sensor_id)
 
     async def send_envelope(self, envelope: ControlEnvelope) -> None:
-        await self.websocket.send(json.dumps(envelope.to_dict()))
+        await self.websocket.send(encode_envelope(envelope))
+
+    async def send_body(self, body: ControlBody) -> None:
+        await self.websocket.send(self._encoder.encode(body))
+
+    async def send_encoded_body(self, body: bytes) -> None:
+        await self.websocket.send(self._encoder.frame(body))
 
     async def send_chunk_request(
         self,
@@ -39,44 +61,50 @@ class ControlSession:
             window_id=window_id,
             max_in_flight=max_in_flight,
         )
-        envelope = ControlEnvelope(
-            sensor_id=self.sensor_id,
-            body_type="chunk_request",
-            body=request,
-            schema_version=PIPELINE_SCHEMA_VERSION,
-        )
-        await self.send_envelope(envelope)
+        await self.send_body(request)
 
     async def send_ack(
         self, *, sequences: Iterable[int], window_id: str, reset_window: bool = False
     ) -> None:
-        ack = ChunkAck(
-            window_id=window_id,
-            committed_sequences=list(sequences),
-            reset_window=reset_window,
-        )
-        envelope = ControlEnvelope(
-            sensor_id=self.sensor_id,
-            body_type="chunk_ack",
-            body=ack,
-            schema_version=PIPELINE_SCHEMA_VERSION,
-        )
-        await self.send_envelope(envelope)
+        runs = sequence_runs(sequences)
+        count = sum(length for _, length in runs)
+        if len(runs) * 2 < count:
+            ack = ChunkAck(
+                window_id=window_id,
+                committed_sequences=[],
+                reset_window=reset_window,
+                committed_runs=runs,
+            )
+        else:
+            ack = ChunkAck(
+                window_id=window_id,
+                committed_sequences=[
+                    sequence for start, length in runs for sequence in range(start, start + length)
+                ],
+                reset_window=reset_window,
+            )
+        await self.send_body(ack)
 
 
 class ControlManager:
     def __init__(self) -> None:
+        # Copy-on-write: writers swap in a new dict under the lock, so the hot
+        # lookup path reads the current reference without locking.
         self._sessions: Dict[str, ControlSession] = {}
         self._lock = asyncio.Lock()
 
     async def register(self, session: ControlSession) -> None:
         async with self._lock:
-            self._sessions[session.sensor_id] = session
+            sessions = dict(self._sessions)
+            sessions[session.sensor_id] = session
+            self._sessions = sessions
             LOGGER.info("sensor %s connected to control channel", session.sensor_id)
 
     async def unregister(self, sensor_id: str) -> None:
         async with self._lock:
-            self._sessions.pop(sensor_id, None)
+            sessions = dict(self._sessions)
+            sessions.pop(sensor_id, None)
+            self._sessions = sessions
             LOGGER.info("sensor %s disconnected", sensor_id)
 
     async def send_chunk_request(
@@ -89,7 +117,7 @@ class ControlManager:
         window_id: str,
         max_in_flight: int,
     ) -> bool:
-        session = await self._get_session(sensor_id)
+        session = self._get_session(sensor_id)
         if not session:
             return False
         await session.send_chunk_request(
@@ -101,6 +129,48 @@ class ControlManager:
         )
         return True
 
+    async def broadcast_chunk_request(
+        self,
+        sensor_ids: Iterable[str],
+        *,
+        since_sequence: int,
+        max_chunks: int,
+        max_bytes: int,
+        window_id: str,
+        max_in_flight: int,
+    ) -> List[str]:
+        """Send one chunk request to several sensors, encoding the body once.
+
+        Returns the sensor ids the request was delivered to.
+        """
+        sessions = [
+            session
+            for session in (self._get_session(sensor_id) for sensor_id in sensor_ids)
+            if session is not None
+        ]
+        if not sessions:
+            return []
+        body = encode_body(
+            ChunkRequest(
+                since_sequence=since_sequence,
+                max_chunks=max_chunks,
+                max_bytes=max_bytes,
+                window_id=window_id,
+                max_in_flight=max_in_flight,
+            )
+        )
+        results = await asyncio.gather(
+            *(session.send_encoded_body(body) for session in sessions),
+            return_exceptions=True,
+        )
+        delivered = []
+        for session, result in zip(sessions, results):
+            if isinstance(result, Exception):
+                LOGGER.warning("chunk request to %s failed: %s", session.sensor_id, result)
+            else:
+                delivered.append(session.sensor_id)
+        return delivered
+
     async def send_ack(
         self,
         sensor_id: str,
@@ -109,7 +179,7 @@ class ControlManager:
         window_id: str,
         reset_window: bool = False,
     ) -> bool:
-        session = await self._get_session(sensor_id)
+        session = self._get_session(sensor_id)
         if not session:
             return False
         await session.send_ack(
@@ -119,9 +189,104 @@ class ControlManager:
         )
         return True
 
-    async def _get_session(self, sensor_id: str) -> Optional[ControlSession]:
-        async with self._lock:
-            return self._sessions.get(sensor_id)
+    def _get_session(self, sensor_id: str) -> Optional[ControlSession]:
+        return self._sessions.get(sensor_id)
+
+
+class AckBatcher:
+    """Coalesces chunk acks per (sensor, window) into one ChunkAck.
+
+    Sequences are held for ``delay`` seconds after the first one arrives, or until
+    ``max_batch`` are waiting, so a burst of ingested chunks costs one control frame.
+    """
+
+    def __init__(self, manager: ControlManager, *, delay: float = 0.005, max_batch: int = 256) -> None:
+        self._manager = manager
+        self._delay = delay
+        self._max_batch = max_batch
+        self._pending: Dict[Tuple[str, str], List[int]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._sends: set[asyncio.Task] = set()
+
+    def add(self, sensor_id: str, window_id: str, sequence: int) -> None:
+        key = (sensor_id, window_id)
+        sequences = self._pending.setdefault(key, [])
+        sequences.append(sequence)
+        if len(sequences) >= self._max_batch:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(self._delay, self._flush, key)
+
+    async def close(self) -> None:
+        """Send everything still pending and wait for the sends to finish."""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        sequences = self._pending.pop(key, None)
+        if not sequences:
+            return
+        task = asyncio.ensure_future(self._send(key, sorted(sequences)))
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    async def _send(self, key: Tuple[str, str], sequences: List[int]) -> None:
+        sensor_id, window_id = key
+        try:
+            await self._manager.send_ack(sensor_id, sequences=sequences, window_id=window_id)
+        except Exception as exc:
+            LOGGER.warning("chunk ack to %s failed: %s", sensor_id, exc)
+
+
+class HeartbeatBatcher:
+    """Collects heartbeats from every session and hands them over in batches.
+
+    A batch is flushed once ``max_batch`` heartbeats are waiting or ``max_delay``
+    seconds after its first heartbeat arrived, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        callback: HeartbeatBatchCallback,
+        *,
+        max_batch: int = 256,
+        max_delay: float = 0.05,
+        max_pending: int = 4096,
+    ) -> None:
+        self._callback = callback
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._queue: asyncio.Queue[Tuple[str, Heartbeat]] = asyncio.Queue(maxsize=max_pending)
+
+    async def put(self, sensor_id: str, heartbeat: Heartbeat) -> None:
+        await self._queue.put((sensor_id, heartbeat))
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self._max_delay
+            while len(batch) < self._max_batch:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._callback(batch)
+            except Exception:
+                LOGGER.exception("heartbeat batch handler failed")
 
 
 async def control_server(
@@ -133,13 +298,15 @@ async def control_server(
     sensor_tokens: Optional[Mapping[str, str]] = None,
     on_heartbeat: Optional[Callable[[str, Heartbeat], Awaitable[None]]] = None,
     on_message: Optional[Callable[[str, ControlEnvelope], Awaitable[None]]] = None,
+    on_heartbeat_batch: Optional[HeartbeatBatchCallback] = None,
 ) -> None:
     try:
         import websockets
     except ModuleNotFoundError as exc:  # pragma: no cover - optional dependency
         raise RuntimeError("websockets package is required for control_server") from exc
 
-    tokens = dict(sensor_tokens or {})
+    tokens = digest_tokens(sensor_tokens)
+    batcher = HeartbeatBatcher(on_heartbeat_batch) if on_heartbeat_batch else None
 
     async def _handler(websocket):
         headers = websocket.request_headers
@@ -154,18 +321,23 @@ async def control_server(
             LOGGER.warning("unexpected sensor id %s attempted to connect", sensor_id)
             await websocket.close(code=1008, reason="unauthorized sensor")
             return
-        if not constant_time_compare(expected, token):
+        if not verify_token_digest(expected, token):
             LOGGER.warning("invalid token for sensor %s", sensor_id)
             await websocket.close(code=1008, reason="invalid token")
             return
 
         session = ControlSession(sensor_id=sensor_id, websocket=websocket)
         await manager.register(session)
+        debug = LOGGER.debug
         try:
             async for message in websocket:
-                envelope = ControlEnvelope.from_dict(json.loads(message))
-                LOGGER.debug("control message from %s: %s", sensor_id, envelope.body_type)
-                if envelope.body_type == "heartbeat" and on_heartbeat:
+                envelope = decode_envelope(message)
+                # Skip building the log call per message unless debug output is on.
+                if LOGGER.isEnabledFor(logging.DEBUG):
+                    debug("control message from %s: %s", sensor_id, envelope.body_type)
+                if envelope.body_type == "heartbeat" and batcher:
+                    await batcher.put(sensor_id, envelope.body)  # type: ignore[arg-type]
+                elif envelope.body_type == "heartbeat" and on_heartbeat:
                     await on_heartbeat(sensor_id, envelope.body)  # type: ignore[arg-type]
                 elif on_message:
                     await on_message(sensor_id, envelope)
@@ -174,6 +346,12 @@ async def control_server(
         finally:
             await manager.unregister(sensor_id)
 
-    server = await websockets.serve(_handler, host, port, ssl=ssl_context)
+    server = await websockets.serve(
+        _handler, host, port, ssl=ssl_context, compression=None, max_size=2**20
+    )
+    if batcher is not None:
+        drain = asyncio.create_task(batcher.run())
+        # The batcher lives exactly as long as the server it feeds.
+        asyncio.ensure_future(server.wait_closed()).add_done_callback(lambda _: drain.cancel())
     LOGGER.info("control server listening on %s:%d", host, port)
     return server
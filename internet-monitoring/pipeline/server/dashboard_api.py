@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
-import json
-import statistics
-from collections import defaultdict
-from datetime import datetime, timedelta, timezone
+import heapq
+import math
+import mmap
+import re
+import time
+from array import array
+from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Sequence
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
 
-from .snapshot_cache import SnapshotCache
+import msgspec
+
+from .snapshot_cache import Snapshot, SnapshotCache
 
 DEFAULT_SAMPLE_PATH = Path(__file__).with_name("sample_dashboard.json")
 
@@ -34,21 +41,47 @@ _SEVERITY_MAP = {
 }
 
 
+# Timestamps already in the form _now_iso produces need no parsing at all.
+_ISO_Z_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$")
+
+
 def _now_iso(now: Optional[datetime] = None) -> str:
-    stamp = now or datetime.now(timezone.utc)
-    return stamp.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    if now is None:
+        return _format_epoch(float(int(time.time())))
+    return now.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+@lru_cache(maxsize=4096)
+def _format_epoch(epoch: float) -> str:
+    return _now_iso(datetime.fromtimestamp(epoch, tz=timezone.utc))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_timestamp(value: str) -> str:
+    if _ISO_Z_RE.match(value):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    return _now_iso(parsed)
+
+
+@lru_cache(maxsize=4)
+def _read_sample(path: Path) -> Dict[str, Any]:
+    # The sample is only read, never modified, so one parsed copy is shared by every
+    # empty-cache build; decoding straight from the mapping skips a read() copy.
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        return msgspec.json.decode(view)
 
 
 def _load_sample(sample_path: Optional[Path]) -> Dict[str, Any]:
     for candidate in filter(None, (sample_path, DEFAULT_SAMPLE_PATH)):
         candidate = candidate.expanduser()
         if candidate.is_file():
-            with candidate.open("r", encoding="utf-8") as handle:
-                return json.load(handle)
-    # Last resort minimal payload to keep the UI responsive.
-    now = _now_iso()
+            return _read_sample(candidate)
+    # Last resort minimal payload to keep the UI responsive; generatedAt is stamped per call.
     return {
-        "generatedAt": now,
         "reportingWindow": "Live snapshot",
         "kpis": {
             "globalAvailability": 0.0,
@@ -67,11 +100,22 @@ def _load_sample(sample_path: Optional[Path]) -> Dict[str, Any]:
     }
 
 
+_DASHBOARD_KEYS = frozenset(("kpis", "timeline", "sensors", "journeys"))
+
+
 def _looks_like_dashboard(payload: Mapping[str, Any]) -> bool:
-    return all(key in payload for key in ("kpis", "timeline", "sensors", "journeys"))
+    return _DASHBOARD_KEYS <= payload.keys()
 
 
 def _coerce_float(value: Any, default: float = 0.0) -> float:
+    # Payload values are nearly always already numbers or missing; check those first.
+    kind = type(value)
+    if kind is float:
+        return value
+    if kind is int:
+        return float(value)
+    if value is None:
+        return default
     try:
         return float(value)
     except (TypeError, ValueError):
@@ -79,15 +123,27 @@ def _coerce_float(value: Any, default: float = 0.0) -> float:
 
 
 def _coerce_int(value: Any, default: int = 0) -> int:
+    kind = type(value)
+    if kind is int:
+        return value
+    if value is None:
+        return default
     try:
         return int(value)
     except (TypeError, ValueError):
         return default
 
 
+@lru_cache(maxsize=256)
+def _canon(value: str) -> str:
+    # Status and severity values come from a handful of spellings, so the
+    # strip/lower copies are made once per spelling rather than once per field.
+    return value.strip().lower()
+
+
 def _normalize_status(value: Any, *, availability: Optional[float] = None) -> str:
     if isinstance(value, str):
-        key = value.strip().lower()
+        key = _canon(value)
         if key in ("ok", "healthy"):
             return "operational"
         if key in ("warn", "warning", "minor"):
@@ -111,22 +167,52 @@ def _status_priority(status: str) -> int:
 
 def _normalize_severity(value: Any) -> str:
     if isinstance(value, str):
-        mapped = _SEVERITY_MAP.get(value.strip().lower())
+        mapped = _SEVERITY_MAP.get(_canon(value))
         if mapped:
             return mapped
     return "info"
 
 
 def _timestamp_from(value: Any, *, fallback: datetime) -> str:
+    # Points of one series repeat the same few timestamps, so parsing is memoized.
     if isinstance(value, (int, float)):
-        return _now_iso(datetime.fromtimestamp(float(value), tz=timezone.utc))
+        return _format_epoch(float(value))
     if isinstance(value, str):
-        try:
-            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except ValueError:
+        return _normalize_timestamp(value)
+    return _format_epoch(fallback.timestamp())
+
+
+# Alternative spellings sensors use for numeric fields, in order of preference.
+_AVAILABILITY_KEYS = ("availability", "success_rate", "successRate")
+_LATENCY_KEYS = ("latency_ms", "latencyMs", "response_time", "responseTimeMs")
+_JITTER_KEYS = ("jitter", "jitter_ms", "jitterMs")
+_PACKET_LOSS_KEYS = ("packet_loss", "packetLoss", "loss", "loss_percent")
+_SUCCESS_RATE_KEYS = ("success_rate", "successRate")
+_RESPONSE_TIME_KEYS = ("response_time", "response_time_ms", "responseTimeMs")
+_IMPACTED_SITES_KEYS = ("impacted_sites", "sites_impacted")
+_AFFECTED_SITES_KEYS = ("affected_sites", "sites")
+# Sensor-level headline figures, looked up in the sensor metadata before the payload.
+_SENSOR_AVAILABILITY_KEYS = ("availability", "availability_percent")
+_SENSOR_LATENCY_KEYS = ("latency_ms", "latencyMs")
+_SENSOR_PACKET_LOSS_KEYS = ("packet_loss", "packetLoss")
+
+
+def _first(entry: Mapping[str, Any], keys: Tuple[str, ...]) -> Any:
+    """Return the first value under ``keys`` that is not None.
+
+    Unlike chaining ``entry.get(a) or entry.get(b)``, a reported 0 is kept rather
+    than skipped in favour of the next spelling or the default.
+    """
+    for key in keys:
+        value = entry.get(key)
+        if value is not None:
             return value
-        return _now_iso(parsed)
-    return _now_iso(fallback)
+    return None
+
+
+def _first_reported(metadata: Mapping[str, Any], payload: Mapping[str, Any], keys: Tuple[str, ...]) -> Any:
+    value = _first(metadata, keys)
+    return value if value is not None else _first(payload, keys)
 
 
 def _extract_metadata(payload: Mapping[str, Any]) -> Mapping[str, Any]:
@@ -183,24 +269,16 @@ def _extract_performance(
                     fallback=fallback_timestamp,
                 )
                 availability = _coerce_float(
-                    entry.get("availability")
-                    or entry.get("success_rate")
-                    or entry.get("successRate"),
+                    _first(entry, _AVAILABILITY_KEYS),
                     default=fallback_availability,
                 )
                 latency = _coerce_float(
-                    entry.get("latency_ms")
-                    or entry.get("latencyMs")
-                    or entry.get("response_time")
-                    or entry.get("responseTimeMs"),
+                    _first(entry, _LATENCY_KEYS),
                     default=fallback_latency,
                 )
-                jitter = _coerce_float(entry.get("jitter") or entry.get("jitter_ms") or entry.get("jitterMs"), 0.0)
+                jitter = _coerce_float(_first(entry, _JITTER_KEYS), 0.0)
                 packet_loss = _coerce_float(
-                    entry.get("packet_loss")
-                    or entry.get("packetLoss")
-                    or entry.get("loss")
-                    or entry.get("loss_percent"),
+                    _first(entry, _PACKET_LOSS_KEYS),
                     0.0,
                 )
                 points.append(
@@ -239,13 +317,13 @@ def _extract_journeys(payload: Mapping[str, Any], sensor_id: str) -> List[Dict[s
             if not journey_id:
                 continue
             name = _normalize_text(entry.get("name") or entry.get("label") or journey_id, default=journey_id)
-            success = _coerce_float(entry.get("success_rate") or entry.get("successRate"), default=100.0)
+            success = _coerce_float(_first(entry, _SUCCESS_RATE_KEYS), default=100.0)
             response = _coerce_float(
-                entry.get("response_time") or entry.get("response_time_ms") or entry.get("responseTimeMs"),
+                _first(entry, _RESPONSE_TIME_KEYS),
                 default=_coerce_float(entry.get("latency_ms"), default=0.0),
             )
             status = _normalize_status(entry.get("status"), availability=success)
-            impacted_sites = _coerce_int(entry.get("impacted_sites") or entry.get("sites_impacted"), default=0)
+            impacted_sites = _coerce_int(_first(entry, _IMPACTED_SITES_KEYS), default=0)
             impacted_sensors = []
             raw_impacted = entry.get("impacted_sensors") or entry.get("top_impacted_sensors")
             if isinstance(raw_impacted, Sequence):
@@ -290,7 +368,7 @@ def _extract_alerts(payload: Mapping[str, Any], sensor_id: str, fallback: dateti
                     "summary": _normalize_text(entry.get("summary") or entry.get("message"), default=alert_id),
                     "detectedAt": detected_at,
                     "impactedJourneys": impacted_journeys,
-                    "affectedSites": _coerce_int(entry.get("affected_sites") or entry.get("sites"), default=0),
+                    "affectedSites": _coerce_int(_first(entry, _AFFECTED_SITES_KEYS), default=0),
                     "acknowledged": bool(entry.get("acknowledged") or entry.get("cleared")),
                 }
             )
@@ -319,35 +397,67 @@ def _extract_ingest_rates(payload: Mapping[str, Any]) -> List[float]:
     return values
 
 
-def _build_timeline(performance_sets: List[List[Mapping[str, Any]]]) -> List[Dict[str, Any]]:
-    buckets: MutableMapping[str, List[Mapping[str, Any]]] = defaultdict(list)
-    for series in performance_sets:
-        for point in series:
-            if not isinstance(point, Mapping):
-                continue
-            timestamp = point.get("timestamp")
-            if not isinstance(timestamp, str):
-                continue
-            buckets[timestamp].append(point)
-    timeline: List[Dict[str, Any]] = []
-    for timestamp in sorted(buckets.keys()):
-        points = buckets[timestamp]
-        if not points:
-            continue
-        success_values = [_coerce_float(p.get("availability"), default=0.0) for p in points]
-        latency_values = [_coerce_float(p.get("latencyMs"), default=0.0) for p in points]
-        timeline.append(
-            {
-                "timestamp": timestamp,
-                "successRate": round(sum(success_values) / len(success_values), 2),
-                "latencyMs": round(sum(latency_values) / len(latency_values)),
-            }
+class _PerformanceSeries(NamedTuple):
+    """Column-wise copy of one sensor's performance points for timeline aggregation."""
+
+    timestamps: List[str]
+    availability: array
+    latency: array
+
+    @classmethod
+    def from_points(cls, points: Sequence[Mapping[str, Any]]) -> "_PerformanceSeries":
+        return cls(
+            [point["timestamp"] for point in points],
+            array("d", [point["availability"] for point in points]),
+            array("d", [point["latencyMs"] for point in points]),
         )
+
+
+def _build_timeline(performance_sets: Sequence[_PerformanceSeries]) -> List[Dict[str, Any]]:
+    # Each series is already sorted by timestamp (see _extract_performance), so a
+    # k-way merge yields buckets in order and no final sort over them is needed.
+    timeline: List[Dict[str, Any]] = []
+    current: Optional[str] = None
+    success_sum = latency_sum = 0.0
+    count = 0
+    for timestamp, success, latency in heapq.merge(
+        *(zip(*series) for series in performance_sets), key=itemgetter(0)
+    ):
+        if timestamp != current:
+            if count:
+                timeline.append(_timeline_point(current, success_sum, latency_sum, count))
+            current, success_sum, latency_sum, count = timestamp, 0.0, 0.0, 0
+        success_sum += success
+        latency_sum += latency
+        count += 1
+    if count:
+        timeline.append(_timeline_point(current, success_sum, latency_sum, count))
     return timeline
 
 
+def _timeline_point(timestamp: str, success_sum: float, latency_sum: float, count: int) -> Dict[str, Any]:
+    return {
+        "timestamp": timestamp,
+        "successRate": round(success_sum / count, 2),
+        "latencyMs": round(latency_sum / count),
+    }
+
+
+# statistics.mean/median work in exact fractions; plain floats are all the KPIs need.
+def _mean(values: Sequence[float]) -> float:
+    return math.fsum(values) / len(values)
+
+
+def _median(values: Sequence[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
 def _fallback_timeline(now: datetime, sensors: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
-    base = now.replace(minute=0, second=0, microsecond=0)
+    base = int(now.timestamp()) // 3600 * 3600
     availability = [
         _coerce_float(sensor.get("availability"), default=0.0)
         for sensor in sensors
@@ -362,7 +472,7 @@ def _fallback_timeline(now: datetime, sensors: Sequence[Mapping[str, Any]]) -> L
     avg_latency = sum(latency) / len(latency) if latency else 0.0
     return [
         {
-            "timestamp": _now_iso(base - (2 - index) * timedelta(hours=1)),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(base - (2 - index) * 3600)),
             "successRate": round(avg_availability, 2),
             "latencyMs": round(avg_latency),
         }
@@ -370,96 +480,160 @@ def _fallback_timeline(now: datetime, sensors: Sequence[Mapping[str, Any]]) -> L
     ]
 
 
+class _SnapshotSummary(NamedTuple):
+    sensor: Dict[str, Any]
+    performance: _PerformanceSeries
+    # (status priority, journey) pairs, ranked once when the snapshot is summarized.
+    journeys: List[Tuple[int, Dict[str, Any]]]
+    alerts: List[Dict[str, Any]]
+    ingest_rates: List[float]
+    # Set instead of the fields above when the sensor sent a complete dashboard.
+    dashboard: Optional[Mapping[str, Any]] = None
+
+
+# Snapshots are replaced rather than mutated, so a summary stays valid for as long
+# as the same Snapshot object is cached for its sensor.
+_summaries: Dict[str, Tuple[Snapshot, Optional[_SnapshotSummary]]] = {}
+# (cache, generation, sample_path, epoch hour, payload) of the most recent build. The
+# hour is part of the key because the fallback timeline is bucketed on it.
+_last_build: Optional[Tuple[SnapshotCache, int, Optional[Path], int, Dict[str, Any]]] = None
+
+
+def _summarize_snapshot(snapshot: Snapshot) -> Optional[_SnapshotSummary]:
+    cached = _summaries.get(snapshot.sensor_id)
+    if cached is not None and cached[0] is snapshot:
+        return cached[1]
+    summary = _build_snapshot_summary(snapshot)
+    _summaries[snapshot.sensor_id] = (snapshot, summary)
+    return summary
+
+
+def _build_snapshot_summary(snapshot: Snapshot) -> Optional[_SnapshotSummary]:
+    payload = snapshot.as_json()
+    if not isinstance(payload, Mapping):
+        return None
+    if _looks_like_dashboard(payload):
+        return _SnapshotSummary({}, _PerformanceSeries([], array("d"), array("d")), [], [], [], dashboard=payload)
+
+    metadata = _extract_metadata(payload)
+    name = _normalize_text(metadata.get("name") or payload.get("name"), default=snapshot.sensor_id)
+    site = _normalize_site(metadata, payload)
+    region = _normalize_region(metadata, payload)
+    isp = _normalize_isp(metadata, payload)
+
+    availability = _coerce_float(
+        _first_reported(metadata, payload, _SENSOR_AVAILABILITY_KEYS), default=100.0
+    )
+    latency = _coerce_float(_first_reported(metadata, payload, _SENSOR_LATENCY_KEYS), default=0.0)
+    packet_loss = _coerce_float(
+        _first_reported(metadata, payload, _SENSOR_PACKET_LOSS_KEYS), default=0.0
+    )
+
+    updated_at = datetime.fromtimestamp(snapshot.updated_at, tz=timezone.utc)
+    performance = _extract_performance(
+        payload,
+        fallback_timestamp=updated_at,
+        fallback_availability=availability,
+        fallback_latency=latency,
+    )
+
+    return _SnapshotSummary(
+        sensor={
+            "id": snapshot.sensor_id,
+            "name": name,
+            "site": site or "",
+            "region": region or "",
+            "isp": isp or "",
+            "lastCheck": _timestamp_from(payload.get("last_check"), fallback=updated_at),
+            "availability": round(availability, 2),
+            "latencyMs": round(latency),
+            "packetLoss": round(packet_loss, 2),
+            "status": _normalize_status(payload.get("status"), availability=availability),
+            "journeysImpacted": 0,
+            "performance": performance,
+        },
+        performance=_PerformanceSeries.from_points(performance),
+        journeys=[
+            (_status_priority(journey["status"]), journey)
+            for journey in _extract_journeys(payload, snapshot.sensor_id)
+        ],
+        alerts=_extract_alerts(payload, snapshot.sensor_id, updated_at),
+        ingest_rates=_extract_ingest_rates(payload),
+    )
+
+
 def build_dashboard_payload(cache: SnapshotCache, *, sample_path: Optional[Path] = None) -> Dict[str, Any]:
-    snapshots = cache.all()
+    """Build the dashboard payload, reusing the previous one while no snapshot changed.
+
+    ``generatedAt`` is stamped on every call unless the payload carries its own. The
+    result is a fresh top-level dict, but nested values are shared between calls and
+    must be treated as read-only.
+    """
+    global _last_build
     now = datetime.now(timezone.utc)
+    hour = int(now.timestamp()) // 3600
+    generation = cache.generation
+    last = _last_build
+    if (
+        last is not None
+        and last[0] is cache
+        and last[1] == generation
+        and last[2] == sample_path
+        and last[3] == hour
+    ):
+        payload = last[4]
+    else:
+        payload = _build_dashboard_payload(cache, sample_path=sample_path, now=now)
+        _last_build = (cache, generation, sample_path, hour, payload)
+    return {"generatedAt": _now_iso(now), **payload}
+
+
+def _build_dashboard_payload(
+    cache: SnapshotCache, *, sample_path: Optional[Path], now: datetime
+) -> Dict[str, Any]:
+    snapshots = cache.all()
     if not snapshots:
         return _load_sample(sample_path)
 
     sensors: List[Dict[str, Any]] = []
-    performance_sets: List[List[Mapping[str, Any]]] = []
+    performance_sets: List[_PerformanceSeries] = []
     ingest_rates: List[float] = []
     alerts_by_id: Dict[str, Dict[str, Any]] = {}
-    journeys_by_id: Dict[str, Dict[str, Any]] = {}
+    journeys_by_id: Dict[str, Tuple[int, Dict[str, Any]]] = {}
 
     for snapshot in snapshots.values():
-        payload = snapshot.as_json()
-        if isinstance(payload, Mapping) and _looks_like_dashboard(payload):
-            return payload  # Sensor already computed a full snapshot payload.
-        if not isinstance(payload, Mapping):
+        summary = _summarize_snapshot(snapshot)
+        if summary is None:
             continue
+        if summary.dashboard is not None:
+            return summary.dashboard  # Sensor already computed a full snapshot payload.
 
-        metadata = _extract_metadata(payload)
-        name = _normalize_text(metadata.get("name") or payload.get("name"), default=snapshot.sensor_id)
-        site = _normalize_site(metadata, payload)
-        region = _normalize_region(metadata, payload)
-        isp = _normalize_isp(metadata, payload)
-
-        availability = _coerce_float(
-            metadata.get("availability")
-            or payload.get("availability")
-            or payload.get("availability_percent"),
-            default=100.0,
-        )
-        latency = _coerce_float(
-            metadata.get("latency_ms")
-            or payload.get("latency_ms")
-            or payload.get("latencyMs"),
-            default=0.0,
-        )
-        packet_loss = _coerce_float(
-            metadata.get("packet_loss")
-            or payload.get("packet_loss")
-            or payload.get("packetLoss"),
-            default=0.0,
-        )
-
-        updated_at = datetime.fromtimestamp(snapshot.updated_at, tz=timezone.utc)
-        performance = _extract_performance(
-            payload,
-            fallback_timestamp=updated_at,
-            fallback_availability=availability,
-            fallback_latency=latency,
-        )
-        performance_sets.append(performance)
+        performance_sets.append(summary.performance)
 
-        journeys = _extract_journeys(payload, snapshot.sensor_id)
-        for journey in journeys:
-            key = journey["id"]
+        for ranked in summary.journeys:
+            key = ranked[1]["id"]
             existing = journeys_by_id.get(key)
-            if existing is None or _status_priority(journey["status"]) > _status_priority(existing["status"]):
-                journeys_by_id[key] = journey
+            if existing is None or ranked[0] > existing[0]:
+                journeys_by_id[key] = ranked
 
-        alerts = _extract_alerts(payload, snapshot.sensor_id, updated_at)
-        for alert in alerts:
+        for alert in summary.alerts:
             alerts_by_id.setdefault(alert["id"], alert)
 
-        ingest_rates.extend(_extract_ingest_rates(payload))
-
-        sensors.append(
-            {
-                "id": snapshot.sensor_id,
-                "name": name,
-                "site": site or "",
-                "region": region or "",
-                "isp": isp or "",
-                "lastCheck": _timestamp_from(payload.get("last_check"), fallback=updated_at),
-                "availability": round(availability, 2),
-                "latencyMs": round(latency),
-                "packetLoss": round(packet_loss, 2),
-                "status": _normalize_status(payload.get("status"), availability=availability),
-                "journeysImpacted": 0,
-                "performance": performance,
-            }
-        )
+        ingest_rates.extend(summary.ingest_rates)
 
+        # journeysImpacted is filled in below, so keep the memoized dict untouched.
+        sensors.append(dict(summary.sensor))
     if not sensors:
         return _load_sample(sample_path)
 
-    journeys = sorted(journeys_by_id.values(), key=lambda entry: _status_priority(entry["status"]), reverse=True)
+    journeys = [journey for _, journey in sorted(journeys_by_id.values(), key=itemgetter(0), reverse=True)]
+    # Invert journey -> impacted sensors once instead of scanning every journey per sensor.
+    impacted_counts: Dict[str, int] = {}
+    for journey in journeys:
+        for sensor_id in set(journey.get("topImpactedSensors") or ()):
+            impacted_counts[sensor_id] = impacted_counts.get(sensor_id, 0) + 1
     for sensor in sensors:
-        impacted = sum(1 for journey in journeys if sensor["id"] in (journey.get("topImpactedSensors") or []))
-        sensor["journeysImpacted"] = impacted
+        sensor["journeysImpacted"] = impacted_counts.get(sensor["id"], 0)
 
     timeline = _build_timeline(performance_sets)
     if not timeline:
@@ -468,21 +642,14 @@ def build_dashboard_payload(cache: SnapshotCache, *, sample_path: Optional[Path]
     availability_values = [sensor["availability"] for sensor in sensors]
     latency_values = [sensor["latencyMs"] for sensor in sensors]
 
-    try:
-        global_availability = round(statistics.mean(availability_values), 2)
-    except statistics.StatisticsError:
-        global_availability = 0.0
-    try:
-        median_latency = round(statistics.median(latency_values))
-    except statistics.StatisticsError:
-        median_latency = 0.0
+    global_availability = round(_mean(availability_values), 2) if availability_values else 0.0
+    median_latency = round(_median(latency_values)) if latency_values else 0.0
 
-    ingest_rate = round(statistics.mean(ingest_rates), 2) if ingest_rates else float(len(sensors)) * 60.0
+    ingest_rate = round(_mean(ingest_rates), 2) if ingest_rates else float(len(sensors)) * 60.0
 
     alerts = sorted(alerts_by_id.values(), key=lambda entry: entry["detectedAt"], reverse=True)
 
     return {
-        "generatedAt": _now_iso(now),
         "reportingWindow": f"Live snapshots from {len(sensors)} sensor(s)",
         "kpis": {
             "globalAvailability": global_availability,
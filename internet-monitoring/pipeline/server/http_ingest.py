@@ -3,21 +3,43 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import hmac
+import logging
 import ssl
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Awaitable, Callable, Mapping, Optional, Sequence
+from typing import Awaitable, Callable, Dict, Mapping, Optional, Sequence, Tuple
 
-from ..common.auth import constant_time_compare, extract_bearer
-from ..common.messages import DataChunk
-from .control import ControlManager
+import msgspec
+from aiohttp import web
+
+from ..common.auth import digest_tokens, extract_bearer, token_digest
+from ..common.messages import DataChunk, decode_chunk, decode_chunk_batch
+from .control import AckBatcher, ControlManager
 from .offsets import OffsetTracker
 from .store import ChunkStore, IngestResult
 
+LOGGER = logging.getLogger(__name__)
+
 OnSnapshotCallback = Callable[[IngestResult], Awaitable[None] | None]
 DashboardProvider = Callable[[], Mapping[str, object]]
 
+_NO_HEADERS: Mapping[str, str] = {}
+_BAD_CHUNK_BODY = b'{"error":"bad_chunk"}'
+_UNAUTHORIZED_BODY = b'{"error":"unauthorized"}'
+
+
+def _render_cors_headers(origin: str) -> Tuple[Mapping[str, str], Mapping[str, str]]:
+    headers = {"Access-Control-Allow-Origin": origin}
+    if origin != "*":
+        headers["Vary"] = "Origin"
+    preflight = {
+        **headers,
+        "Access-Control-Allow-Headers": "Authorization, Content-Type",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    }
+    return headers, preflight
+
 
 class ChunkIngestService:
     def __init__(
@@ -26,23 +48,33 @@ class ChunkIngestService:
         control: ControlManager,
         offsets: OffsetTracker,
         *,
-        loop: Optional[asyncio.AbstractEventLoop] = None,
         on_snapshot: Optional[OnSnapshotCallback] = None,
         sensor_tokens: Optional[Mapping[str, str]] = None,
         dashboard_provider: Optional[DashboardProvider] = None,
         allowed_origins: Optional[Sequence[str]] = None,
     ) -> None:
         self._store = store
+        # Every ChunkStore call runs on this single worker: the SQLite work (commits,
+        # event assembly, pruning) stays off the loop shared with the control and
+        # stream servers, and the one connection is never used concurrently.
+        self._store_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-store")
         self._control = control
+        self._acks = AckBatcher(control)
         self._offsets = offsets
-        self._loop = loop
         self._on_snapshot = on_snapshot
-        self._tokens = dict(sensor_tokens or {})
+        self._tokens = digest_tokens(sensor_tokens)
         self._dashboard_provider = dashboard_provider
-        self._allowed_origins = list(allowed_origins or [])
+        # Rendered (simple, preflight) header sets per allowed origin, built once.
+        self._cors: Dict[str, Tuple[Mapping[str, str], Mapping[str, str]]] = {
+            origin: _render_cors_headers(origin) for origin in allowed_origins or ()
+        }
+        # Snapshot callbacks run in the background, kept referenced until done.
+        self._snapshot_tasks: set[asyncio.Task] = set()
 
-    def set_loop(self, loop: asyncio.AbstractEventLoop) -> None:
-        self._loop = loop
+    async def close(self) -> None:
+        """Flush acks that are still being coalesced and wait for pending store work."""
+        await self._acks.close()
+        await asyncio.get_running_loop().run_in_executor(None, self._store_pool.shutdown)
 
     def set_dashboard_provider(self, provider: Optional[DashboardProvider]) -> None:
         self._dashboard_provider = provider
@@ -56,31 +88,54 @@ class ChunkIngestService:
         return payload
 
     def resolve_cors_origin(self, origin: Optional[str]) -> Optional[str]:
-        if not self._allowed_origins:
-            return None
-        if "*" in self._allowed_origins:
+        if "*" in self._cors:
             return "*"
-        if origin and origin in self._allowed_origins:
+        if origin and origin in self._cors:
             return origin
         return None
 
-    def ingest(self, payload: bytes, headers: dict) -> tuple[int, dict]:
-        body = json.loads(payload.decode("utf-8"))
-        chunk = DataChunk.from_dict(body)
-        self._validate_sensor(headers, chunk.sensor_id)
-        result = self._store.ingest(chunk)
-
-        self._offsets.update(chunk.sensor_id, chunk.sequence)
-        self._dispatch_ack(
-            sensor_id=chunk.sensor_id,
-            sequence=chunk.sequence,
-            window_id=chunk.attributes.get("window_id", "default"),
+    def cors_headers(self, origin: Optional[str], *, preflight: bool = False) -> Mapping[str, str]:
+        """Return the prebuilt CORS headers for ``origin``; callers must not mutate them."""
+        allowed = self.resolve_cors_origin(origin)
+        if not allowed:
+            return _NO_HEADERS
+        return self._cors[allowed][preflight]
+
+    async def ingest_async(self, payload: bytes, headers: Mapping[str, str]) -> tuple[int, dict]:
+        """``headers`` only needs a case-insensitive ``get``, as aiohttp's request headers provide."""
+        chunk = decode_chunk(payload, headers.get("Content-Type"))
+        return HTTPStatus.OK, await self._ingest_chunk(chunk, headers)
+
+    async def ingest_batch_async(self, payload: bytes, headers: Mapping[str, str]) -> tuple[int, dict]:
+        chunks = decode_chunk_batch(payload)
+        return HTTPStatus.OK, {"results": await self._ingest_chunks(chunks, headers)}
+
+    async def _ingest_chunk(self, chunk: DataChunk, headers: Mapping[str, str]) -> dict:
+        return (await self._ingest_chunks([chunk], headers))[0]
+
+    async def _ingest_chunks(self, chunks: Sequence[DataChunk], headers: Mapping[str, str]) -> list:
+        # One bearer per request: hash it once and check it once per sensor in the batch.
+        received = token_digest(extract_bearer(headers.get("Authorization")))
+        for sensor_id in {chunk.sensor_id for chunk in chunks}:
+            expected = self._tokens.get(sensor_id)
+            if expected is None or not hmac.compare_digest(expected, received):
+                raise PermissionError("unauthorized sensor")
+        # The whole batch is verified and committed in one transaction on the store
+        # worker; offsets, acks and snapshots are updated back on the loop.
+        results = await asyncio.get_running_loop().run_in_executor(
+            self._store_pool, self._store.ingest_many, chunks
         )
-
-        if result.event_complete and result.assembled_payload and self._on_snapshot:
-            self._dispatch_snapshot(result)
-
-        return HTTPStatus.OK, {
+        bodies = []
+        for chunk, result in zip(chunks, results):
+            self._offsets.update(chunk.sensor_id, chunk.sequence)
+            self._acks.add(chunk.sensor_id, chunk.attributes.get("window_id", "default"), chunk.sequence)
+            if result.event_complete and result.assembled_payload and self._on_snapshot:
+                self._dispatch_snapshot(result)
+            bodies.append(self._result_body(chunk, result))
+        return bodies
+
+    def _result_body(self, chunk: DataChunk, result: IngestResult) -> dict:
+        return {
             "stored": result.stored,
             "duplicate": result.duplicate,
             "sequence": result.sequence,
@@ -90,138 +145,103 @@ class ChunkIngestService:
             "last_committed_sequence": self._offsets.get(chunk.sensor_id),
         }
 
-    def _dispatch_ack(self, *, sensor_id: str, sequence: int, window_id: str) -> None:
-        if self._loop is None:
-            # Fallback for tests where no loop is registered.
-            asyncio.run(
-                self._control.send_ack(
-                    sensor_id,
-                    sequences=[sequence],
-                    window_id=window_id,
-                )
-            )
+    def _dispatch_snapshot(self, result: IngestResult) -> None:
+        # Plain callbacks run inline; only coroutine callbacks need a task.
+        try:
+            maybe = self._on_snapshot(result)
+        except Exception:
+            LOGGER.exception("snapshot handler failed")
             return
+        if asyncio.iscoroutine(maybe):
+            task = asyncio.ensure_future(maybe)
+            self._snapshot_tasks.add(task)
+            task.add_done_callback(self._snapshot_done)
 
-        asyncio.run_coroutine_threadsafe(
-            self._control.send_ack(
-                sensor_id,
-                sequences=[sequence],
-                window_id=window_id,
-            ),
-            self._loop,
-        )
+    def _snapshot_done(self, task: asyncio.Task) -> None:
+        self._snapshot_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            LOGGER.error("snapshot handler failed", exc_info=task.exception())
 
-    def _dispatch_snapshot(self, result: IngestResult) -> None:
-        if not self._on_snapshot:
-            return
 
-        async def _invoke() -> None:
-            maybe = self._on_snapshot(result)
-            if asyncio.iscoroutine(maybe):
-                await maybe
-
-        if self._loop is None:
-            asyncio.run(_invoke())
-        else:
-            asyncio.run_coroutine_threadsafe(_invoke(), self._loop)
-
-    def _validate_sensor(self, headers: Mapping[str, str], sensor_id: str) -> None:
-        token = extract_bearer(headers.get("Authorization"))
-        expected = self._tokens.get(sensor_id)
-        if not constant_time_compare(expected, token):
-            raise PermissionError("unauthorized sensor")
-
-
-def build_handler(service: ChunkIngestService):
-    class Handler(BaseHTTPRequestHandler):
-        def _write_json(self, status: int, payload: Mapping[str, object]) -> None:
-            data = json.dumps(payload).encode("utf-8")
-            self.send_response(status)
-            origin = service.resolve_cors_origin(self.headers.get("Origin"))
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Content-Length", str(len(data)))
-            if origin:
-                self.send_header("Access-Control-Allow-Origin", origin)
-                if origin != "*":
-                    self.send_header("Vary", "Origin")
-                self.send_header("Access-Control-Allow-Headers", "Authorization, Content-Type")
-                self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-            self.end_headers()
-            self.wfile.write(data)
-
-        def do_POST(self):  # noqa: N802
-            if self.path != "/v1/ingest/chunk":
-                self.send_error(HTTPStatus.NOT_FOUND, "unknown path")
-                return
-            length = int(self.headers.get("Content-Length", "0"))
-            payload = self.rfile.read(length)
+def create_app(service: ChunkIngestService, *, client_max_size: int = 64 * 1024 * 1024) -> web.Application:
+    """Build the ingest API, served on the same event loop as the control and stream servers."""
+
+    @web.middleware
+    async def cors(request, handler):
+        response = await handler(request)
+        response.headers.update(service.cors_headers(request.headers.get("Origin"), preflight=True))
+        return response
+
+    def _raw_json(status: int, body: bytes) -> web.Response:
+        return web.Response(status=status, body=body, content_type="application/json")
+
+    def _json(status: int, payload: Mapping[str, object]) -> web.Response:
+        return _raw_json(status, msgspec.json.encode(payload))
+
+    def _ingest_route(ingest):
+        async def handler(request: web.Request) -> web.Response:
+            payload = await request.read()
             try:
-                status, response = service.ingest(payload, dict(self.headers))
-            except PermissionError as exc:
-                self.send_error(HTTPStatus.UNAUTHORIZED, str(exc))
-                return
-            except Exception as exc:  # pragma: no cover - defensive path
-                self.send_error(
-                    HTTPStatus.BAD_REQUEST,
-                    f"failed to ingest chunk: {exc}",
-                )
-                return
-            self._write_json(status, response)
-
-        def do_GET(self):  # noqa: N802
-            if self.path == "/v1/dashboard":
-                try:
-                    payload = service.dashboard()
-                except LookupError:
-                    self.send_error(HTTPStatus.NOT_FOUND, "dashboard not enabled")
-                    return
-                except Exception as exc:  # pragma: no cover - defensive path
-                    self.send_error(
-                        HTTPStatus.INTERNAL_SERVER_ERROR,
-                        f"failed to build dashboard payload: {exc}",
-                    )
-                    return
-                self._write_json(HTTPStatus.OK, payload)
-                return
-            if self.path in {"/healthz", "/"}:
-                self.send_response(HTTPStatus.NO_CONTENT)
-                origin = service.resolve_cors_origin(self.headers.get("Origin"))
-                if origin:
-                    self.send_header("Access-Control-Allow-Origin", origin)
-                    if origin != "*":
-                        self.send_header("Vary", "Origin")
-                self.end_headers()
-                return
-            self.send_error(HTTPStatus.NOT_FOUND, "unknown path")
-
-        def do_OPTIONS(self):  # noqa: N802
-            origin = service.resolve_cors_origin(self.headers.get("Origin"))
-            self.send_response(HTTPStatus.NO_CONTENT)
-            if origin:
-                self.send_header("Access-Control-Allow-Origin", origin)
-                if origin != "*":
-                    self.send_header("Vary", "Origin")
-                self.send_header("Access-Control-Allow-Headers", "Authorization, Content-Type")
-                self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-                self.send_header("Access-Control-Max-Age", "600")
-            self.end_headers()
-
-        def log_message(self, fmt, *args):  # noqa: D401 - standard signature
-            # Silence default logging; upstream logger should handle messages.
-            return
+                status, response = await ingest(payload, request.headers)
+            except PermissionError:
+                return _raw_json(HTTPStatus.UNAUTHORIZED, _UNAUTHORIZED_BODY)
+            except ValueError as exc:
+                # Malformed or corrupt chunks (msgspec.DecodeError is a ValueError) are the
+                # expected failure; answer with a static body and log without a traceback.
+                LOGGER.warning("rejected chunk from %s: %s", request.remote, exc)
+                return _raw_json(HTTPStatus.BAD_REQUEST, _BAD_CHUNK_BODY)
+            except Exception:  # pragma: no cover - defensive path
+                LOGGER.exception("failed to ingest chunk")
+                return _raw_json(HTTPStatus.BAD_REQUEST, _BAD_CHUNK_BODY)
+            return _json(status, response)
+
+        return handler
+
+    async def dashboard(request: web.Request) -> web.Response:
+        try:
+            payload = service.dashboard()
+        except LookupError:
+            return web.Response(status=HTTPStatus.NOT_FOUND, text="dashboard not enabled")
+        except Exception as exc:  # pragma: no cover - defensive path
+            return web.Response(
+                status=HTTPStatus.INTERNAL_SERVER_ERROR,
+                text=f"failed to build dashboard payload: {exc}",
+            )
+        return _json(HTTPStatus.OK, payload)
+
+    async def health(request: web.Request) -> web.Response:
+        return web.Response(status=HTTPStatus.NO_CONTENT)
+
+    async def preflight(request: web.Request) -> web.Response:
+        response = web.Response(status=HTTPStatus.NO_CONTENT)
+        if service.resolve_cors_origin(request.headers.get("Origin")):
+            response.headers["Access-Control-Max-Age"] = "600"
+        return response
 
-    return Handler
+    app = web.Application(client_max_size=client_max_size, middlewares=[cors])
+    app.router.add_post("/v1/ingest/chunk", _ingest_route(service.ingest_async))
+    app.router.add_post("/v1/ingest/chunks", _ingest_route(service.ingest_batch_async))
+    app.router.add_get("/v1/dashboard", dashboard)
+    app.router.add_get("/healthz", health)
+    app.router.add_get("/", health)
+    app.router.add_route("OPTIONS", "/{tail:.*}", preflight)
+    return app
 
 
-def create_server(
+async def start_server(
     host: str,
     port: int,
     service: ChunkIngestService,
     *,
     ssl_context: Optional[ssl.SSLContext] = None,
-):
-    handler = build_handler(service)
-    httpd = ThreadingHTTPServer((host, port), handler)
-    if ssl_context is not None:
-        httpd.socket = ssl_context.wrap_socket(httpd.socket, server_side=True)
-    return httpd
+    read_bufsize: int = 4 * 1024 * 1024,
+) -> web.AppRunner:
+    """Start serving on the running loop; ``cleanup()`` the returned runner to stop.
+
+    ``read_bufsize`` bounds how much of a request body aiohttp buffers before pausing
+    the socket; the 256 KiB default stalls multi-megabyte chunk batches on flow control.
+    """
+    runner = web.AppRunner(create_app(service), access_log=None, read_bufsize=read_bufsize)
+    await runner.setup()
+    await web.TCPSite(runner, host, port, ssl_context=ssl_context).start()
+    return runner
@@ -8,27 +8,26 @@ import contextlib
 import logging
 import signal
 import ssl
-import threading
 from pathlib import Path
 from typing import Any, Dict, Iterable, Optional
 
-import yaml
-
+from ..common import event_loop
+from ..common.yaml_io import safe_load
 from .control import ControlManager, control_server
-from .http_ingest import ChunkIngestService, create_server
+from .http_ingest import ChunkIngestService, start_server
 from .offsets import OffsetTracker
 from .scheduler import RequestScheduler
 from .dashboard_api import build_dashboard_payload
 from .snapshot_cache import SnapshotCache
 from .store import ChunkStore, IngestResult
-from .stream import SnapshotStreamer
+from .stream import SnapshotPublisher, SnapshotStreamer
 
 LOGGER = logging.getLogger("pipeline.server")
 
 
 def load_config(path: Path) -> Dict[str, Any]:
     with path.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle)
+        data = safe_load(handle)
     if not isinstance(data, dict):
         raise ValueError("server configuration must be a mapping")
     return data
@@ -78,23 +77,19 @@ async def run_server(config: Dict[str, Any], *, config_path: Optional[Path] = No
     if not sensor_tokens:
         LOGGER.warning("No sensor tokens configured; sensors will be rejected")
 
-    loop = asyncio.get_running_loop()
-
-    async def handle_snapshot(result: IngestResult) -> None:
+    def handle_snapshot(result: IngestResult) -> None:
         snapshot = snapshot_cache.update_from_ingest(result)
         if snapshot:
-            await streamer.broadcast(snapshot)
-            await streamer.broadcast_dashboard(
-                build_dashboard_payload(
-                    snapshot_cache,
-                    sample_path=sample_path_obj,
-                )
-            )
-
-    async def handle_heartbeat(sensor_id: str, heartbeat) -> None:
-        offsets.update(sensor_id, int(heartbeat.last_committed_sequence))
-        if heartbeat.queue_depth > 0:
-            await scheduler.request_sensor(sensor_id)
+            publisher.put(snapshot)
+
+    async def handle_heartbeats(batch) -> None:
+        backlogged: Dict[str, None] = {}
+        for sensor_id, heartbeat in batch:
+            offsets.update(sensor_id, int(heartbeat.last_committed_sequence))
+            if heartbeat.queue_depth > 0:
+                backlogged[sensor_id] = None
+        if backlogged:
+            await scheduler.request_sensors(backlogged)
 
     ingest_cfg = config.get("ingest", {})
     ingest_ssl = build_server_ssl(ingest_cfg.get("tls", {}))
@@ -116,26 +111,25 @@ async def run_server(config: Dict[str, Any], *, config_path: Optional[Path] = No
             sample_path=sample_path_obj,
         )
 
+    publisher = SnapshotPublisher(streamer, dashboard_provider=dashboard_provider)
+    publisher_task = asyncio.create_task(publisher.run())
+
     ingest_service = ChunkIngestService(
         store,
         control,
         offsets,
-        loop=loop,
         on_snapshot=handle_snapshot,
         sensor_tokens=sensor_tokens,
         dashboard_provider=dashboard_provider,
         allowed_origins=list(allow_origins) if allow_origins else ["*"],
     )
 
-    httpd = create_server(
+    ingest_runner = await start_server(
         ingest_cfg.get("bind", "0.0.0.0"),
         int(ingest_cfg.get("port", 8081)),
         ingest_service,
         ssl_context=ingest_ssl,
     )
-
-    http_thread = threading.Thread(target=httpd.serve_forever, daemon=True)
-    http_thread.start()
     LOGGER.info("HTTP ingest listening on %s:%s", ingest_cfg.get("bind", "0.0.0.0"), ingest_cfg.get("port", 8081))
 
     control_cfg = config.get("control", {})
@@ -147,7 +141,7 @@ async def run_server(config: Dict[str, Any], *, config_path: Optional[Path] = No
         port=int(control_cfg.get("port", 8765)),
         ssl_context=control_ssl,
         sensor_tokens=sensor_tokens,
-        on_heartbeat=handle_heartbeat,
+        on_heartbeat_batch=handle_heartbeats,
     )
 
     stream_ssl = build_server_ssl(stream_cfg.get("tls", {}))
@@ -172,12 +166,16 @@ async def run_server(config: Dict[str, Any], *, config_path: Optional[Path] = No
         await stop_event.wait()
     finally:
         LOGGER.info("shutting down pipeline server")
+        # Stop ingest first so coalesced acks still reach sensors over the control channel.
+        await ingest_runner.cleanup()
+        await ingest_service.close()
+        publisher_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await publisher_task
         control_server_task.close()
         with contextlib.suppress(Exception):
             await control_server_task.wait_closed()
         await streamer.stop()
-        httpd.shutdown()
-        http_thread.join(timeout=5)
         store.close()
 
 
@@ -199,7 +197,7 @@ def main() -> None:
 
     config_path = Path(args.config)
     config = load_config(config_path)
-    asyncio.run(run_server(config, config_path=config_path))
+    event_loop.run(run_server(config, config_path=config_path))
 
 
 if __name__ == "__main__":
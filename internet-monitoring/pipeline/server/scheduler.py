@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import time
-from typing import Iterable, Optional
+from typing import Dict, Iterable, List, Optional
 
 from .control import ControlManager
 from .offsets import OffsetTracker
@@ -51,4 +51,21 @@ class RequestScheduler:
         )
 
     async def request_sensors(self, sensor_ids: Iterable[str]) -> None:
-        await asyncio.gather(*(self.request_sensor(sensor_id) for sensor_id in sensor_ids))
+        # Sensors resuming from the same offset share one encoded request body.
+        by_offset: Dict[int, List[str]] = {}
+        for sensor_id in sensor_ids:
+            by_offset.setdefault(self._offsets.get(sensor_id), []).append(sensor_id)
+        window_id = f"window-{int(time.time() * 1000)}"
+        await asyncio.gather(
+            *(
+                self._control.broadcast_chunk_request(
+                    group,
+                    since_sequence=since,
+                    max_chunks=self._max_chunks,
+                    max_bytes=self._max_bytes,
+                    window_id=window_id,
+                    max_in_flight=self._max_in_flight,
+                )
+                for since, group in by_offset.items()
+            )
+        )
@@ -2,14 +2,38 @@
 
 from __future__ import annotations
 
-import json
-import threading
+import binascii
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Optional
 
+import msgspec
+
 from .store import IngestResult
 
+try:
+    from pybase64 import b64encode_as_string as _b64encode
+except ImportError:  # pragma: no cover - pybase64 is an optional accelerator
+
+    def _b64encode(data: bytes) -> str:
+        # binascii directly: base64.b64encode wraps it and strips a trailing newline.
+        return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+
+class _StreamSnapshot(msgspec.Struct, omit_defaults=True):
+    """Wire form of a snapshot on the stream. A fixed-field Struct encodes with its keys
+    pre-rendered, without building and walking a dict."""
+
+    sensor_id: str
+    event_id: str
+    logical_timestamp_ms: int
+    updated_at: float
+    payload_json: msgspec.Raw
+    payload_base64: Optional[str] = None
+
+
+_EMPTY_OBJECT = msgspec.Raw(b"{}")
+
 
 @dataclass
 class Snapshot:
@@ -18,18 +42,54 @@ class Snapshot:
     payload: bytes
     logical_timestamp_ms: int
     updated_at: float
+    _parsed: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    _invalid_json: bool = field(default=False, init=False, repr=False, compare=False)
+    _stream_json: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
 
     def as_json(self) -> dict:
-        try:
-            return json.loads(self.payload.decode("utf-8"))
-        except Exception:
-            return {}
+        # Snapshots are replaced, never mutated, on each ingest, so parse at most once.
+        if self._parsed is None:
+            try:
+                self._parsed = msgspec.json.decode(self.payload)
+            except Exception:
+                self._parsed = {}
+                self._invalid_json = True
+        return self._parsed
+
+    def stream_json(self) -> bytes:
+        """The snapshot as sent to stream clients, JSON encoded once and then reused by
+        every broadcast and snapshot batch it appears in.
+
+        A JSON payload is embedded verbatim as ``payload_json``; only payloads that are
+        not JSON are also sent as ``payload_base64``, so the bytes cross the wire once.
+        """
+        if self._stream_json is None:
+            self.as_json()
+            invalid = self._invalid_json
+            self._stream_json = msgspec.json.encode(
+                _StreamSnapshot(
+                    sensor_id=self.sensor_id,
+                    event_id=self.event_id,
+                    logical_timestamp_ms=self.logical_timestamp_ms,
+                    updated_at=self.updated_at,
+                    payload_json=_EMPTY_OBJECT if invalid else msgspec.Raw(self.payload),
+                    payload_base64=_b64encode(self.payload) if invalid else None,
+                )
+            )
+        return self._stream_json
 
 
 class SnapshotCache:
+    """Latest snapshot per sensor, used only from the server's event loop, so unlocked."""
+
     def __init__(self) -> None:
         self._snapshots: Dict[str, Snapshot] = {}
-        self._lock = threading.Lock()
+        # Bumped on every stored snapshot so derived views can tell when to rebuild.
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
 
     def update_from_ingest(self, ingest: IngestResult) -> Optional[Snapshot]:
         if not ingest.event_complete or not ingest.assembled_payload:
@@ -41,14 +101,12 @@ class SnapshotCache:
             logical_timestamp_ms=ingest.logical_timestamp_ms,
             updated_at=time.time(),
         )
-        with self._lock:
-            self._snapshots[ingest.sensor_id] = snapshot
+        self._snapshots[ingest.sensor_id] = snapshot
+        self._generation += 1
         return snapshot
 
     def get(self, sensor_id: str) -> Optional[Snapshot]:
-        with self._lock:
-            return self._snapshots.get(sensor_id)
+        return self._snapshots.get(sensor_id)
 
     def all(self) -> Dict[str, Snapshot]:
-        with self._lock:
-            return dict(self._snapshots)
+        return dict(self._snapshots)
@@ -3,23 +3,51 @@
 from __future__ import annotations
 
 import asyncio
-import base64
-import json
-from typing import Dict, List, Optional, Set
+import logging
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set
 
-from ..common.auth import constant_time_compare, extract_bearer
+import msgspec
+
+from ..common.auth import extract_bearer, token_digest, verify_token_digest
 from .snapshot_cache import Snapshot, SnapshotCache
 
+LOGGER = logging.getLogger(__name__)
+
+_ENCODER = msgspec.json.Encoder()
+
+
+def _dumps(message: Dict[str, object]) -> str:
+    # Sent as text frames: browser clients JSON.parse a string, not a binary Blob.
+    return _ENCODER.encode(message).decode("utf-8")
+
+
+# Snapshots arrive already encoded (Snapshot.stream_json), so their envelopes are
+# assembled by concatenation rather than by building and encoding a dict.
+_SNAPSHOT_PREFIX = b'{"type":"snapshot","snapshot":'
+_BATCH_PREFIX = b'{"type":"snapshot_batch","snapshots":['
+
+
+def _snapshot_message(snapshot: Snapshot) -> str:
+    return b"".join((_SNAPSHOT_PREFIX, snapshot.stream_json(), b"}")).decode("utf-8")
+
+
+def _batch_message(snapshots: Iterable[Snapshot]) -> str:
+    body = b",".join(snapshot.stream_json() for snapshot in snapshots)
+    return b"".join((_BATCH_PREFIX, body, b"]}")).decode("utf-8")
+
 
 class SnapshotStreamer:
     def __init__(self, cache: SnapshotCache, token: str | None = None) -> None:
         self._cache = cache
-        self._token = token or ""
+        # Hashed once, like the ingest and control tokens, so connects compare fixed-size digests.
+        self._token_digest = token_digest(token) if token else None
         self._clients: Set["websockets.WebSocketServerProtocol"] = set()
-        self._lock = asyncio.Lock()
         self._server = None
         self._latest_dashboard: Optional[Dict[str, object]] = None
         self._latest_dashboard_message: Optional[str] = None
+        # Encoded snapshot_batch message and the cache generation it reflects.
+        self._batch_message: Optional[str] = None
+        self._batch_generation = -1
 
     async def start(self, host: str, port: int, *, ssl_context=None):
         import websockets
@@ -39,24 +67,27 @@ class SnapshotStreamer:
             self._server = None
 
     async def broadcast(self, snapshot: Snapshot) -> None:
-        message = json.dumps({
-            "type": "snapshot",
-            "snapshot": self._serialize_snapshot(snapshot),
-        })
-        await self._publish(message)
+        await self._publish(_snapshot_message(snapshot))
+
+    async def broadcast_many(self, snapshots: List[Snapshot]) -> None:
+        """Publish several snapshots in one frame; a lone snapshot keeps its own message type."""
+        if len(snapshots) == 1:
+            await self.broadcast(snapshots[0])
+            return
+        await self._publish(_batch_message(snapshots))
 
     async def broadcast_all(self) -> None:
-        snapshots = self._cache.all().values()
-        payload = json.dumps(
-            {
-                "type": "snapshot_batch",
-                "snapshots": [self._serialize_snapshot(s) for s in snapshots],
-            }
-        )
-        await self._publish(payload)
+        await self._publish(self._snapshot_batch())
+
+    def _snapshot_batch(self) -> str:
+        generation = self._cache.generation
+        if self._batch_message is None or generation != self._batch_generation:
+            self._batch_message = _batch_message(self._cache.all().values())
+            self._batch_generation = generation
+        return self._batch_message
 
     async def broadcast_dashboard(self, payload: Dict[str, object]) -> None:
-        message = json.dumps(
+        message = _dumps(
             {
                 "type": "dashboard",
                 "dashboard": payload,
@@ -73,43 +104,73 @@ class SnapshotStreamer:
         return dict(self._latest_dashboard)
 
     async def _handler(self, websocket, path):
-        if self._token:
+        if self._token_digest is not None:
             token = extract_bearer(websocket.request_headers.get("Authorization"))
-            if not constant_time_compare(self._token, token):
+            if not verify_token_digest(self._token_digest, token):
                 await websocket.close(code=1008, reason="unauthorized")
                 return
-        async with self._lock:
-            self._clients.add(websocket)
+        self._clients.add(websocket)
         try:
-            await self.broadcast_all()
+            # Only the new client needs the current state; the others already have it.
+            await websocket.send(self._snapshot_batch())
             if self._latest_dashboard_message:
                 await websocket.send(self._latest_dashboard_message)
             async for _ in websocket:
                 continue
         finally:
-            async with self._lock:
-                self._clients.discard(websocket)
+            self._clients.discard(websocket)
 
     async def _publish(self, message: str) -> None:
-        async with self._lock:
-            if not self._clients:
-                return
-            dead: List["websockets.WebSocketServerProtocol"] = []
-            for client in self._clients:
-                try:
-                    await client.send(message)
-                except Exception:
-                    dead.append(client)
-            for client in dead:
+        # The client set is only touched from the loop and never across an await, so the
+        # copy below and the discards need no lock. Sends run concurrently, so one slow
+        # client does not delay the others.
+        if not self._clients:
+            return
+        clients: List["websockets.WebSocketServerProtocol"] = list(self._clients)
+        results = await asyncio.gather(*(client.send(message) for client in clients), return_exceptions=True)
+        for client, result in zip(clients, results):
+            if isinstance(result, Exception):
                 self._clients.discard(client)
 
-    @staticmethod
-    def _serialize_snapshot(snapshot: Snapshot) -> dict:
-        return {
-            "sensor_id": snapshot.sensor_id,
-            "event_id": snapshot.event_id,
-            "logical_timestamp_ms": snapshot.logical_timestamp_ms,
-            "updated_at": snapshot.updated_at,
-            "payload_base64": base64.b64encode(snapshot.payload).decode("ascii"),
-            "payload_json": snapshot.as_json(),
-        }
+
+class SnapshotPublisher:
+    """Hands snapshots from ingest to a single writer task so slow UI clients never
+    hold up ingest.
+
+    At most one snapshot waits per sensor, a newer one replacing it, and at most
+    ``max_pending`` sensors wait before the oldest is dropped. Each drained round goes
+    out as one frame, followed by one dashboard broadcast.
+    """
+
+    def __init__(
+        self,
+        streamer: SnapshotStreamer,
+        *,
+        dashboard_provider: Optional[Callable[[], Mapping[str, object]]] = None,
+        max_pending: int = 1024,
+    ) -> None:
+        self._streamer = streamer
+        self._dashboard_provider = dashboard_provider
+        self._max_pending = max_pending
+        self._pending: Dict[str, Snapshot] = {}
+        self._ready = asyncio.Event()
+
+    def put(self, snapshot: Snapshot) -> None:
+        pending = self._pending
+        pending.pop(snapshot.sensor_id, None)
+        pending[snapshot.sensor_id] = snapshot
+        if len(pending) > self._max_pending:
+            del pending[next(iter(pending))]
+        self._ready.set()
+
+    async def run(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            pending, self._pending = self._pending, {}
+            try:
+                await self._streamer.broadcast_many(list(pending.values()))
+                if self._dashboard_provider is not None:
+                    await self._streamer.broadcast_dashboard(dict(self._dashboard_provider()))
+            except Exception:
+                LOGGER.exception("snapshot broadcast failed")
@@ -1,4 +1,9 @@
-from internet_monitoring.pipeline.common.auth import constant_time_compare, extract_bearer
+from internet_monitoring.pipeline.common.auth import (
+    constant_time_compare,
+    digest_tokens,
+    extract_bearer,
+    verify_token_digest,
+)
 
 
 def test_extract_bearer_variants():
@@ -12,3 +17,19 @@ def test_constant_time_compare():
     assert constant_time_compare("secret", "secret") is True
     assert constant_time_compare("secret", "SECRET") is False
     assert constant_time_compare("secret", None) is False
+
+
+def test_constant_time_compare_accepts_bytes():
+    assert constant_time_compare(b"secret", "secret") is True
+    assert constant_time_compare(b"secret", b"other") is False
+    assert constant_time_compare("sécret", "sécret") is True
+
+
+def test_verify_token_digest():
+    expected = digest_tokens({"sensor-1": "secret"})["sensor-1"]
+    assert len(expected) == 32
+    assert verify_token_digest(expected, "secret") is True
+    assert verify_token_digest(expected, b"secret") is True
+    assert verify_token_digest(expected, "secret-but-longer") is False
+    assert verify_token_digest(expected, None) is False
+    assert verify_token_digest(None, "secret") is False
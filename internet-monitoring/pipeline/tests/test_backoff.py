@@ -11,3 +11,10 @@ def test_backoff_grows_until_max():
     assert backoff.next_interval() == backoff.max_interval
     backoff.reset()
     assert backoff.next_interval() == 0.1
+
+
+def test_backoff_jitter_stays_within_bounds():
+    backoff = ExponentialBackoff(base=1.0, factor=1.0, max_interval=1.0, jitter=0.1)
+    intervals = [backoff.next_interval() for _ in range(200)]
+    assert all(0.9 <= value <= 1.1 for value in intervals)
+    assert len(set(intervals)) > 1
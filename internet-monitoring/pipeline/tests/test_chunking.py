@@ -2,22 +2,56 @@ from __future__ import annotations
 
 import gzip
 import os
+from hashlib import sha256
 
 from internet_monitoring.pipeline.common.chunking import (
     DEFAULT_CHUNK_SIZE,
     EventChunk,
     chunk_payload,
+    chunk_payload_from_iter,
     random_event_id,
 )
+from internet_monitoring.pipeline.common.hashing import BLAKE3, SHA256, digest
 
 
 def test_chunking_round_trip():
     data = os.urandom(DEFAULT_CHUNK_SIZE + 1024)
     event_id = random_event_id()
-    chunks = chunk_payload(data, event_id, chunk_size=DEFAULT_CHUNK_SIZE)
+    chunks = chunk_payload(data, event_id, chunk_size=DEFAULT_CHUNK_SIZE, hash_algorithm=SHA256)
     assert len(chunks) == 2
     reassembled = b"".join(gzip.decompress(chunk.payload) for chunk in chunks)
     assert reassembled == data
     # All chunks should share the same event hash.
     event_hashes = {chunk.event_hash for chunk in chunks}
-    assert len(event_hashes) == 1
+    assert event_hashes == {sha256(data).digest()}
+
+
+def test_chunking_blake3_hashes():
+    data = os.urandom(DEFAULT_CHUNK_SIZE + 1024)
+    chunks = chunk_payload(data, random_event_id(), hash_algorithm=BLAKE3)
+    assert {chunk.hash_algorithm for chunk in chunks} == {BLAKE3}
+    assert {chunk.event_hash for chunk in chunks} == {digest(BLAKE3, data)}
+    assert [chunk.chunk_hash for chunk in chunks] == [
+        digest(BLAKE3, chunk.payload) for chunk in chunks
+    ]
+
+
+def test_event_chunk_has_no_instance_dict():
+    chunks = chunk_payload(b"x" * 1024, random_event_id())
+    assert not hasattr(chunks[0], "__dict__")
+    assert isinstance(chunks[0], EventChunk)
+
+
+def test_chunking_from_iter_matches_single_buffer():
+    fragments = [os.urandom(50_000) for _ in range(7)]
+    data = b"".join(fragments)
+    streamed = chunk_payload_from_iter(iter(fragments), chunk_size=DEFAULT_CHUNK_SIZE)
+    direct = chunk_payload(data, random_event_id(), chunk_size=DEFAULT_CHUNK_SIZE)
+    assert [chunk.payload for chunk in streamed] == [chunk.payload for chunk in direct]
+    assert streamed[0].event_hash == direct[0].event_hash
+    assert {chunk.chunk_count for chunk in streamed} == {len(direct)}
+
+
+def test_chunking_empty_payload_yields_no_chunks():
+    assert chunk_payload(b"", random_event_id()) == []
+    assert chunk_payload_from_iter([b"", b""]) == []
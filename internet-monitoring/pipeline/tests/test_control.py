@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+from internet_monitoring.pipeline.common.messages import ChunkRequest, Heartbeat, decode_envelope
+from internet_monitoring.pipeline.server.control import (
+    AckBatcher,
+    ControlManager,
+    ControlSession,
+    HeartbeatBatcher,
+)
+
+
+class FakeWebsocket:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.frames: list[bytes] = []
+
+    async def send(self, frame: bytes) -> None:
+        if self.fail:
+            raise ConnectionError("closed")
+        self.frames.append(frame)
+
+
+def test_broadcast_chunk_request_reaches_connected_sensors():
+    manager = ControlManager()
+    sockets = {"sensor-a": FakeWebsocket(), "sensor-b": FakeWebsocket(), "sensor-c": FakeWebsocket(fail=True)}
+
+    async def scenario():
+        for sensor_id, websocket in sockets.items():
+            await manager.register(ControlSession(sensor_id=sensor_id, websocket=websocket))
+        return await manager.broadcast_chunk_request(
+            ["sensor-a", "sensor-b", "sensor-c", "sensor-missing"],
+            since_sequence=5,
+            max_chunks=8,
+            max_bytes=1024,
+            window_id="window-1",
+            max_in_flight=8,
+        )
+
+    delivered = asyncio.run(scenario())
+    assert delivered == ["sensor-a", "sensor-b"]
+    for sensor_id in delivered:
+        (frame,) = sockets[sensor_id].frames
+        envelope = decode_envelope(frame)
+        assert envelope.sensor_id == sensor_id
+        assert envelope.body == ChunkRequest(
+            since_sequence=5, max_chunks=8, max_bytes=1024, window_id="window-1", max_in_flight=8
+        )
+
+
+def test_heartbeat_batcher_flushes_by_size_and_delay():
+    batches: list[list[tuple[str, Heartbeat]]] = []
+
+    async def collect(batch):
+        batches.append(batch)
+
+    def heartbeat(depth: int) -> Heartbeat:
+        return Heartbeat(
+            software_version="1.0", last_committed_sequence=depth, queue_depth=depth, clock_skew_ms=0.0
+        )
+
+    async def scenario():
+        batcher = HeartbeatBatcher(collect, max_batch=3, max_delay=0.01)
+        task = asyncio.create_task(batcher.run())
+        for index in range(4):
+            await batcher.put(f"sensor-{index}", heartbeat(index))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert [[sensor_id for sensor_id, _ in batch] for batch in batches] == [
+        ["sensor-0", "sensor-1", "sensor-2"],
+        ["sensor-3"],
+    ]
+
+
+def test_ack_batcher_coalesces_per_window():
+    manager = ControlManager()
+    websocket = FakeWebsocket()
+
+    async def scenario():
+        await manager.register(ControlSession(sensor_id="sensor-a", websocket=websocket))
+        batcher = AckBatcher(manager, delay=0.01, max_batch=3)
+        for sequence in (5, 4, 6):
+            batcher.add("sensor-a", "window-1", sequence)
+        batcher.add("sensor-a", "window-1", 7)
+        batcher.add("sensor-a", "window-2", 8)
+        await batcher.close()
+
+    asyncio.run(scenario())
+    acks = [decode_envelope(frame).body for frame in websocket.frames]
+    assert [(ack.window_id, list(ack.sequences())) for ack in acks] == [
+        ("window-1", [4, 5, 6]),
+        ("window-1", [7]),
+        ("window-2", [8]),
+    ]
@@ -4,8 +4,10 @@ import json
 from datetime import datetime, timezone
 from pathlib import Path
 
+from internet_monitoring.pipeline.server import dashboard_api
 from internet_monitoring.pipeline.server.dashboard_api import build_dashboard_payload
 from internet_monitoring.pipeline.server.snapshot_cache import Snapshot, SnapshotCache
+from internet_monitoring.pipeline.server.store import IngestResult
 
 
 def test_build_dashboard_payload_uses_sample() -> None:
@@ -143,3 +145,92 @@ def test_build_dashboard_payload_from_snapshots() -> None:
     timestamps = [point["timestamp"] for point in payload["timeline"]]
     assert timestamps == sorted(timestamps)
     assert len(timestamps) == 2
+
+
+def test_build_dashboard_payload_reused_until_snapshot_changes() -> None:
+    cache = SnapshotCache()
+
+    def ingest(availability: float) -> None:
+        cache.update_from_ingest(
+            IngestResult(
+                stored=True,
+                duplicate=False,
+                sequence=1,
+                event_id="event-1",
+                sensor_id="sensor-1",
+                logical_timestamp_ms=0,
+                event_complete=True,
+                assembled_payload=json.dumps({"availability": availability}).encode("utf-8"),
+            )
+        )
+
+    ingest(99.0)
+    first = build_dashboard_payload(cache)
+    again = build_dashboard_payload(cache)
+    assert again is not first
+    assert again["sensors"] is first["sensors"]
+
+    ingest(90.0)
+    second = build_dashboard_payload(cache)
+    assert second is not first
+    assert second["kpis"]["globalAvailability"] == 90.0
+
+
+def test_build_dashboard_payload_stamps_each_call(monkeypatch) -> None:
+    class Clock(datetime):
+        current = datetime(2024, 3, 15, 10, 0, tzinfo=timezone.utc)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(dashboard_api, "datetime", Clock)
+    cache = SnapshotCache()
+    cache._snapshots["sensor-1"] = make_snapshot("sensor-1", {"availability": 99.0}, seconds=1710460800)
+
+    first = build_dashboard_payload(cache)
+    Clock.current = datetime(2024, 3, 15, 10, 45, tzinfo=timezone.utc)
+    later = build_dashboard_payload(cache)
+
+    assert first["generatedAt"] == "2024-03-15T10:00:00Z"
+    assert later["generatedAt"] == "2024-03-15T10:45:00Z"
+    assert later["sensors"] is first["sensors"]
+
+
+def test_build_dashboard_payload_keeps_zero_valued_points() -> None:
+    cache = SnapshotCache()
+    cache._snapshots["sensor-1"] = make_snapshot(
+        "sensor-1",
+        {
+            "availability": 50.0,
+            "latency_ms": 80,
+            "performance": [
+                {"timestamp": "2024-03-15T00:00:00Z", "availability": 0.0, "latency_ms": 0, "successRate": 99.0},
+            ],
+        },
+        seconds=1710460800,
+    )
+
+    payload = build_dashboard_payload(cache)
+
+    (point,) = payload["sensors"][0]["performance"]
+    assert point["availability"] == 0.0
+    assert point["latencyMs"] == 0
+    assert payload["timeline"] == [{"timestamp": "2024-03-15T00:00:00Z", "successRate": 0.0, "latencyMs": 0}]
+
+
+def test_build_dashboard_payload_keeps_zero_valued_sensor_figures() -> None:
+    cache = SnapshotCache()
+    cache._snapshots["sensor-1"] = make_snapshot(
+        "sensor-1",
+        {"sensor": {"name": "Edge", "availability": 0.0}, "availability": 75.0, "latency_ms": 0, "packetLoss": 0.0},
+        seconds=1710460800,
+    )
+
+    payload = build_dashboard_payload(cache)
+
+    (sensor,) = payload["sensors"]
+    assert sensor["availability"] == 0.0
+    assert sensor["latencyMs"] == 0
+    assert sensor["packetLoss"] == 0.0
+    assert payload["kpis"]["globalAvailability"] == 0.0
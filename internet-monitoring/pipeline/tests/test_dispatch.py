@@ -40,3 +40,26 @@ def test_dispatch_builds_chunks_and_processes_ack():
         assert queue.queue_depth() == 0
     finally:
         queue.close()
+
+
+def test_dispatch_partial_ack_keeps_window_open():
+    queue = make_queue()
+    try:
+        for _ in range(2):
+            queue.enqueue(chunk_payload(os.urandom(150_000), random_event_id()))
+        dispatcher = ChunkDispatcher("sensor-xyz", queue)
+        first = dispatcher.build_chunks(ChunkRequest(
+            since_sequence=0, max_chunks=2, max_bytes=1_000_000, window_id="w1", max_in_flight=8,
+        ))
+        second = dispatcher.build_chunks(ChunkRequest(
+            since_sequence=first[-1].sequence, max_chunks=2, max_bytes=1_000_000,
+            window_id="w2", max_in_flight=8,
+        ))
+        acked = [first[0].sequence, second[0].sequence, second[1].sequence]
+        dispatcher.handle_ack(ChunkAck(window_id="w1", committed_sequences=acked))
+        assert set(dispatcher._windows) == {"w1"}
+        assert dispatcher._windows["w1"].sequences == {first[1].sequence}
+        assert list(dispatcher._in_flight) == [first[1].sequence]
+        assert dispatcher.last_ack_sequence == second[1].sequence
+    finally:
+        queue.close()
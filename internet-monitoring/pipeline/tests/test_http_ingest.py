@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+
+import aiohttp
+
+from internet_monitoring.pipeline.common.chunking import chunk_payload, random_event_id
+from internet_monitoring.pipeline.common.messages import MSGPACK_CONTENT_TYPE, DataChunk, encode_chunk
+from internet_monitoring.pipeline.server.http_ingest import ChunkIngestService, start_server
+from internet_monitoring.pipeline.server.offsets import OffsetTracker
+from internet_monitoring.pipeline.server.store import ChunkStore
+
+
+class RecordingControl:
+    def __init__(self) -> None:
+        self.acks: list[tuple[str, list[int], str]] = []
+
+    async def send_ack(self, sensor_id, *, sequences, window_id, reset_window=False):
+        self.acks.append((sensor_id, list(sequences), window_id))
+        return True
+
+
+def test_ingest_acks_on_the_loop():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    store = ChunkStore(tmp.name)
+    control = RecordingControl()
+    snapshots = []
+    service = ChunkIngestService(
+        store,
+        control,
+        OffsetTracker(),
+        on_snapshot=snapshots.append,
+        sensor_tokens={"sensor-1": "secret"},
+    )
+    payload = os.urandom(1024)
+    event_id = random_event_id()
+    (piece,) = chunk_payload(payload, event_id)
+    chunk = DataChunk(
+        sensor_id="sensor-1",
+        event_id=event_id,
+        sequence=1,
+        chunk_index=piece.chunk_index,
+        chunk_count=piece.chunk_count,
+        compression=piece.compression,
+        payload=piece.payload,
+        chunk_sha256=piece.chunk_hash,
+        event_sha256=piece.event_hash,
+        created_at="2024-03-15T00:00:00Z",
+        logical_timestamp_ms=piece.logical_timestamp_ms,
+        clock_skew_ms=piece.clock_skew_ms,
+        attributes={},
+        hash_algorithm=piece.hash_algorithm,
+    )
+
+    async def scenario():
+        runner = await start_server("127.0.0.1", 0, service)
+        host, port = runner.addresses[0][:2]
+        url = f"http://{host}:{port}/v1/ingest/chunk"
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    url, data=encode_chunk(chunk), headers={"Content-Type": MSGPACK_CONTENT_TYPE}
+                ) as response:
+                    assert response.status == 401
+                async with session.post(
+                    url,
+                    data=b"not a chunk",
+                    headers={"Content-Type": MSGPACK_CONTENT_TYPE, "Authorization": "Bearer secret"},
+                ) as response:
+                    assert response.status == 400
+                    assert await response.json() == {"error": "bad_chunk"}
+                async with session.post(
+                    url,
+                    data=encode_chunk(chunk),
+                    headers={"Content-Type": MSGPACK_CONTENT_TYPE, "Authorization": "Bearer secret"},
+                ) as response:
+                    assert response.status == 200
+                    body = await response.json()
+        finally:
+            await runner.cleanup()
+            await service.close()
+        return body
+
+    try:
+        body = asyncio.run(scenario())
+    finally:
+        store.close()
+    assert body["stored"] is True
+    assert body["event_complete"] is True
+    assert control.acks == [("sensor-1", [1], "default")]
+    assert [result.assembled_payload for result in snapshots] == [payload]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import base64
+import gc
+import json
+
+from internet_monitoring.pipeline.common.messages import (
+    ChunkAck,
+    ControlEnvelope,
+    DataChunk,
+    EnvelopeEncoder,
+    Heartbeat,
+    decode_chunk,
+    decode_envelope,
+    encode_chunk,
+    encode_envelope,
+    sequence_runs,
+)
+
+
+def _sample_chunk() -> DataChunk:
+    return DataChunk(
+        sensor_id="sensor-1",
+        event_id="evt-1",
+        sequence=7,
+        chunk_index=0,
+        chunk_count=1,
+        compression="gzip",
+        payload=b"\x00\xffpayload",
+        chunk_sha256=b"\x01" * 32,
+        event_sha256=b"\x02" * 32,
+        created_at="2024-01-01T00:00:00Z",
+        logical_timestamp_ms=1234,
+        clock_skew_ms=0.5,
+        attributes={"window_id": "win-1"},
+    )
+
+
+def test_envelope_roundtrip_dispatches_on_body_type():
+    for body in (
+        Heartbeat(software_version="1", last_committed_sequence=3, queue_depth=4, clock_skew_ms=1.5),
+        ChunkAck(window_id="win-1", committed_sequences=[1, 2], reset_window=True),
+    ):
+        envelope = ControlEnvelope(sensor_id="sensor-1", body=body, capabilities=["chunks"])
+        decoded = decode_envelope(encode_envelope(envelope))
+        assert decoded == envelope
+        assert decoded.body_type == type(body).__struct_config__.tag
+        assert not gc.is_tracked(decoded.body)
+
+
+def test_chunk_roundtrip_keeps_raw_bytes():
+    chunk = _sample_chunk()
+    encoded = encode_chunk(chunk)
+    assert chunk.payload in encoded
+    assert decode_chunk(encoded) == chunk
+
+
+def test_chunk_decodes_legacy_json_body():
+    chunk = _sample_chunk()
+    legacy = {
+        "schema_version": chunk.schema_version,
+        "sensor_id": chunk.sensor_id,
+        "event_id": chunk.event_id,
+        "sequence": chunk.sequence,
+        "chunk_index": chunk.chunk_index,
+        "chunk_count": chunk.chunk_count,
+        "compression": chunk.compression,
+        "payload": base64.b64encode(chunk.payload).decode("ascii"),
+        "chunk_sha256": base64.b64encode(chunk.chunk_sha256).decode("ascii"),
+        "event_sha256": base64.b64encode(chunk.event_sha256).decode("ascii"),
+        "created_at": chunk.created_at,
+        "logical_timestamp_ms": chunk.logical_timestamp_ms,
+        "clock_skew_ms": chunk.clock_skew_ms,
+        "attributes": chunk.attributes,
+    }
+    body = json.dumps(legacy).encode("utf-8")
+    assert decode_chunk(body, "application/json; charset=utf-8") == chunk
+
+
+def test_envelope_encoder_matches_full_encode():
+    encoder = EnvelopeEncoder("sensor-1", ["chunks"])
+    for body in (
+        ChunkAck(window_id="win-1", committed_sequences=[1, 2]),
+        ChunkAck(window_id="win-2", committed_sequences=list(range(300)), reset_window=True),
+    ):
+        frame = encoder.encode(body)
+        decoded = decode_envelope(frame)
+        assert decoded.body == body
+        assert decoded.capabilities == ["chunks"]
+        assert frame == encode_envelope(
+            ControlEnvelope(
+                sensor_id="sensor-1", body=body, sent_at=decoded.sent_at, capabilities=["chunks"]
+            )
+        )
+
+
+def test_chunk_ack_runs_expand_to_sequences():
+    sequences = [*range(10, 500), 502, *range(600, 1000)]
+    runs = sequence_runs(sequences)
+    assert runs == [(10, 490), (502, 1), (600, 400)]
+    ack = ChunkAck(window_id="win-1", committed_sequences=[], committed_runs=runs)
+    decoded = decode_envelope(encode_envelope(ControlEnvelope(sensor_id="sensor-1", body=ack)))
+    assert decoded.body == ack
+    assert list(decoded.body.sequences()) == sequences
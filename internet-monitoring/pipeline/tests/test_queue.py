@@ -48,3 +48,98 @@ def test_queue_retention_prunes_old_entries():
         assert queue.queue_depth() <= 2
     finally:
         queue.close()
+
+
+def test_queue_enqueue_returns_stored_sequences():
+    queue = make_queue()
+    try:
+        queue.enqueue(chunk_payload(os.urandom(10_000), random_event_id()))
+        chunks = chunk_payload(os.urandom(400_000), random_event_id(), chunk_size=65_536)
+        queued = queue.enqueue(chunks)
+        window = queue.peek_window(
+            since_sequence=queued[0].sequence - 1,
+            max_chunks=len(chunks),
+            max_bytes=10_000_000,
+        )
+        assert [item.sequence for item in queued] == [item.sequence for item in window]
+        assert [item.chunk_index for item in window] == list(range(len(chunks)))
+    finally:
+        queue.close()
+
+
+def test_queue_reads_legacy_json_attributes():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    queue = DurableQueue(tmp.name)
+    payload = os.urandom(10_000)
+    legacy = chunk_payload(payload, random_event_id())[0]
+    queue._conn.execute(
+        """
+        INSERT INTO chunks (
+            event_id, chunk_index, chunk_count, compression, payload, chunk_hash,
+            event_hash, created_at, logical_timestamp_ms, clock_skew_ms, attributes
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """,
+        (
+            legacy.event_id,
+            legacy.chunk_index,
+            legacy.chunk_count,
+            legacy.compression,
+            legacy.payload,
+            legacy.chunk_hash,
+            legacy.event_hash,
+            time.time(),
+            legacy.logical_timestamp_ms,
+            legacy.clock_skew_ms,
+            '{"probe": "legacy"}',
+        ),
+    )
+    queue.close()
+    queue = DurableQueue(tmp.name)
+    try:
+        queue.enqueue(chunk_payload(payload, random_event_id(), attributes={"probe": "new"}))
+        window = queue.peek_window(since_sequence=0, max_chunks=4, max_bytes=1_000_000)
+        assert [item.attributes for item in window] == [{"probe": "legacy"}, {"probe": "new"}]
+    finally:
+        queue.close()
+
+
+def test_queue_cache_matches_sqlite_window():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    queue = DurableQueue(tmp.name, cache_max_chunks=3)
+    try:
+        for _ in range(3):
+            queue.enqueue(chunk_payload(os.urandom(150_000), random_event_id()))
+        queue.delete_sequences([2])
+        since = queue.last_sequence() - 3
+        cached = queue.peek_window(since_sequence=since, max_chunks=3, max_bytes=300_000)
+        cached[0].attributes["window_id"] = "win-1"
+        queue.close()
+        queue = DurableQueue(tmp.name)
+        stored = queue.peek_window(since_sequence=since, max_chunks=3, max_bytes=300_000)
+        assert cached[0].attributes != stored[0].attributes
+        assert [item._replace(attributes={}) for item in cached] == [
+            item._replace(attributes={}) for item in stored
+        ]
+        assert 2 not in [item.sequence for item in queue.peek_window(
+            since_sequence=0, max_chunks=10, max_bytes=10_000_000
+        )]
+    finally:
+        queue.close()
+
+
+def test_queue_stats_track_writes():
+    queue = make_queue()
+    try:
+        assert queue.stats() == (0, 0, None)
+        queued = queue.enqueue(chunk_payload(os.urandom(150_000), random_event_id()))
+        stats = queue.stats()
+        assert stats.depth == len(queued)
+        assert stats.last_sequence == queued[-1].sequence
+        assert stats.oldest_created_at == queued[0].created_at
+        queue.delete_sequences([queued[0].sequence])
+        assert queue.queue_depth() == len(queued) - 1
+        assert queue.last_sequence() == queued[-1].sequence
+    finally:
+        queue.close()
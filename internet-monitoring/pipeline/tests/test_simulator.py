@@ -84,7 +84,6 @@ async def _run_simulation():
         control.push(
             ControlEnvelope(
                 sensor_id="sensor-sim",
-                body_type="chunk_request",
                 body=request,
             )
         )
@@ -94,7 +93,6 @@ async def _run_simulation():
         control.push(
             ControlEnvelope(
                 sensor_id="sensor-sim",
-                body_type="chunk_ack",
                 body=ack,
             )
         )
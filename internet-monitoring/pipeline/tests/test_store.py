@@ -4,15 +4,19 @@ import os
 import tempfile
 import time
 
+import msgspec
+import pytest
+
 from internet_monitoring.pipeline.common.chunking import chunk_payload, random_event_id
+from internet_monitoring.pipeline.common.hashing import SHA256
 from internet_monitoring.pipeline.common.messages import DataChunk
 from internet_monitoring.pipeline.server.snapshot_cache import SnapshotCache
 from internet_monitoring.pipeline.server.store import ChunkStore
 
 
-def build_data_chunks(sensor_id: str, payload: bytes):
+def build_data_chunks(sensor_id: str, payload: bytes, **kwargs):
     event_id = random_event_id()
-    chunks = chunk_payload(payload, event_id)
+    chunks = chunk_payload(payload, event_id, **kwargs)
     data_chunks = []
     for idx, chunk in enumerate(chunks, start=1):
         created_iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
@@ -31,6 +35,7 @@ def build_data_chunks(sensor_id: str, payload: bytes):
                 logical_timestamp_ms=chunk.logical_timestamp_ms,
                 clock_skew_ms=chunk.clock_skew_ms,
                 attributes={},
+                hash_algorithm=chunk.hash_algorithm,
             )
         )
     return data_chunks
@@ -56,3 +61,112 @@ def test_store_ingest_and_deduplicate():
     assert snapshot is not None
     assert snapshot.sensor_id == "sensor-1"
     store.close()
+
+
+def test_store_rejects_corrupted_chunk():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    store = ChunkStore(tmp.name)
+    try:
+        chunk = build_data_chunks("sensor-1", os.urandom(1024))[0]
+        chunk = msgspec.structs.replace(chunk, chunk_sha256=b"\x00" * 32)
+        with pytest.raises(ValueError, match="chunk hash mismatch"):
+            store.ingest(chunk)
+    finally:
+        store.close()
+
+
+def test_store_verifies_legacy_sha256_chunks():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    store = ChunkStore(tmp.name)
+    try:
+        payload = os.urandom(150_000)
+        for chunk in build_data_chunks("sensor-1", payload, hash_algorithm=SHA256):
+            result = store.ingest(chunk)
+        assert result.event_complete is True
+        assert result.assembled_payload == payload
+    finally:
+        store.close()
+
+
+def test_store_detects_duplicates_after_reopen():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    data_chunks = build_data_chunks("sensor-1", os.urandom(150_000))
+    store = ChunkStore(tmp.name)
+    try:
+        assert store.ingest(data_chunks[1]).stored is True
+        # Out of order, below the sensor's highest stored sequence, but new.
+        assert store.ingest(data_chunks[0]).stored is True
+    finally:
+        store.close()
+    store = ChunkStore(tmp.name)
+    try:
+        assert store.ingest(data_chunks[0]).duplicate is True
+        assert store.ingest(data_chunks[1]).duplicate is True
+    finally:
+        store.close()
+
+
+def test_store_prunes_chunks_of_expired_events():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    store = ChunkStore(tmp.name, retention_seconds=60)
+    try:
+        for chunk in build_data_chunks("sensor-1", os.urandom(150_000)):
+            result = store.ingest(chunk)
+        assert result.event_complete is True
+        store.maintenance(time.time() + 120)
+        assert store._conn.execute("SELECT COUNT(*) FROM chunks;").fetchone()[0] == 0
+        assert store._conn.execute("SELECT COUNT(*) FROM events;").fetchone()[0] == 0
+    finally:
+        store.close()
+
+
+def test_store_ingest_many_commits_batch():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    payload = os.urandom(300_000)
+    data_chunks = build_data_chunks("sensor-1", payload)
+    store = ChunkStore(tmp.name)
+    try:
+        results = store.ingest_many([data_chunks[0], data_chunks[0], *data_chunks[1:]])
+        assert [result.duplicate for result in results] == [False, True] + [False] * (len(data_chunks) - 1)
+        assert results[-1].event_complete is True
+        assert results[-1].assembled_payload == payload
+        assert not any(result.event_complete for result in results[:-1] if not result.duplicate)
+    finally:
+        store.close()
+
+
+def test_store_ingest_many_rolls_back_invalid_batch():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    data_chunks = build_data_chunks("sensor-1", os.urandom(150_000))
+    corrupted = msgspec.structs.replace(data_chunks[1], payload=b"corrupted")
+    store = ChunkStore(tmp.name)
+    try:
+        with pytest.raises(ValueError, match="chunk hash mismatch"):
+            store.ingest_many([data_chunks[0], corrupted])
+        assert store._conn.execute("SELECT COUNT(*) FROM chunks;").fetchone()[0] == 0
+        assert store.ingest(data_chunks[0]).stored is True
+    finally:
+        store.close()
+
+
+def test_store_rejects_conflicting_event_hash():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    data_chunks = build_data_chunks("sensor-1", os.urandom(150_000))
+    conflicting = msgspec.structs.replace(data_chunks[1], event_sha256=b"\x00" * 32)
+    store = ChunkStore(tmp.name)
+    try:
+        assert store.ingest(data_chunks[0]).stored is True
+        with pytest.raises(ValueError, match="event hash mismatch"):
+            store.ingest(conflicting)
+        received = store._conn.execute("SELECT received_chunks FROM events;").fetchone()[0]
+        assert received == 1
+        assert store.ingest(data_chunks[1]).event_complete is True
+    finally:
+        store.close()
@@ -1,8 +1,10 @@
 import asyncio
+import base64
 import json
 
-from internet_monitoring.pipeline.server.snapshot_cache import SnapshotCache
-from internet_monitoring.pipeline.server.stream import SnapshotStreamer
+from internet_monitoring.pipeline.server.snapshot_cache import Snapshot, SnapshotCache
+from internet_monitoring.pipeline.server.store import IngestResult
+from internet_monitoring.pipeline.server.stream import SnapshotPublisher, SnapshotStreamer
 
 
 class DummyClient:
@@ -22,8 +24,7 @@ def test_broadcast_dashboard_persists_and_delivers() -> None:
         streamer = SnapshotStreamer(cache)
 
         client = DummyClient()
-        async with streamer._lock:  # type: ignore[attr-defined]
-            streamer._clients.add(client)  # type: ignore[attr-defined]
+        streamer._clients.add(client)  # type: ignore[attr-defined]
 
         payload = {"generatedAt": "now"}
         await streamer.broadcast_dashboard(payload)
@@ -46,9 +47,7 @@ def test_broadcast_includes_latest_dashboard_on_connect() -> None:
         await streamer.broadcast_dashboard({"generatedAt": "primed"})
 
         client = DummyClient()
-
-        async with streamer._lock:  # type: ignore[attr-defined]
-            streamer._clients.add(client)  # type: ignore[attr-defined]
+        streamer._clients.add(client)  # type: ignore[attr-defined]
 
         # Simulate handler sending existing snapshots and the cached dashboard.
         await streamer.broadcast_all()
@@ -60,3 +59,68 @@ def test_broadcast_includes_latest_dashboard_on_connect() -> None:
         assert any(json.loads(msg).get("type") == "dashboard" for msg in client.messages)
 
     asyncio.run(_run())
+
+
+def test_publisher_coalesces_snapshots_per_sensor() -> None:
+    async def _run() -> None:
+        cache = SnapshotCache()
+        streamer = SnapshotStreamer(cache)
+        client = DummyClient()
+        streamer._clients.add(client)  # type: ignore[attr-defined]
+        publisher = SnapshotPublisher(streamer, dashboard_provider=lambda: {"generatedAt": "now"})
+
+        for event_id, sensor_id in (("e1", "sensor-1"), ("e2", "sensor-2"), ("e3", "sensor-1")):
+            publisher.put(
+                Snapshot(
+                    sensor_id=sensor_id,
+                    event_id=event_id,
+                    logical_timestamp_ms=0,
+                    payload=b"{}",
+                    updated_at=0.0,
+                )
+            )
+        task = asyncio.create_task(publisher.run())
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        messages = [json.loads(message) for message in client.messages]
+        assert [m["type"] for m in messages] == ["snapshot_batch", "dashboard"]
+        assert [s["event_id"] for s in messages[0]["snapshots"]] == ["e2", "e3"]
+
+    asyncio.run(_run())
+
+
+def test_snapshot_batch_is_reused_until_cache_changes() -> None:
+    cache = SnapshotCache()
+    streamer = SnapshotStreamer(cache)
+    first = streamer._snapshot_batch()  # type: ignore[attr-defined]
+    assert streamer._snapshot_batch() is first  # type: ignore[attr-defined]
+
+    cache.update_from_ingest(
+        IngestResult(
+            stored=True,
+            duplicate=False,
+            sequence=1,
+            event_id="e1",
+            sensor_id="sensor-1",
+            logical_timestamp_ms=0,
+            event_complete=True,
+            assembled_payload=b"{}",
+        )
+    )
+    rebuilt = streamer._snapshot_batch()  # type: ignore[attr-defined]
+    assert rebuilt is not first
+    assert [s["event_id"] for s in json.loads(rebuilt)["snapshots"]] == ["e1"]
+
+
+def test_snapshot_wire_form_sends_payload_once() -> None:
+    def snapshot(payload: bytes) -> Snapshot:
+        return Snapshot(sensor_id="sensor-1", event_id="e1", logical_timestamp_ms=0, payload=payload, updated_at=0.0)
+
+    message = json.loads(snapshot(b'{"latency_ms": 12}').stream_json())
+    assert message["payload_json"] == {"latency_ms": 12}
+    assert "payload_base64" not in message
+
+    message = json.loads(snapshot(b"\x00binary").stream_json())
+    assert message["payload_json"] == {}
+    assert base64.b64decode(message["payload_base64"]) == b"\x00binary"
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from internet_monitoring.pipeline.sensor import time_sync
+from internet_monitoring.pipeline.sensor.time_sync import ClockSkewEstimator
+
+
+def test_ntpdate_offset_is_parsed_and_cached(monkeypatch):
+    calls = []
+
+    def fake_check_output(args, **kwargs):
+        calls.append(args)
+        return b"server 192.0.2.1, stratum 2, offset -12.5 msec, delay 0.02\n"
+
+    monkeypatch.setattr(time_sync, "ntplib", None)
+    monkeypatch.setattr(time_sync.subprocess, "check_output", fake_check_output)
+    estimator = ClockSkewEstimator(fallback_skew_ms=3.0)
+    assert estimator.estimate() == -12.5
+    assert estimator.estimate() == -12.5
+    assert len(calls) == 1
+
+
+def test_ntpdate_without_offset_uses_fallback(monkeypatch):
+    monkeypatch.setattr(time_sync, "ntplib", None)
+    monkeypatch.setattr(time_sync.subprocess, "check_output", lambda args, **kwargs: b"no server\n")
+    assert ClockSkewEstimator(fallback_skew_ms=3.0).estimate() == 3.0
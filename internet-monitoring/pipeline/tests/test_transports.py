@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from internet_monitoring.pipeline.common.messages import (
+    DataChunk,
+    decode_chunk,
+    decode_chunk_batch,
+)
+from internet_monitoring.pipeline.sensor import transports
+from internet_monitoring.pipeline.sensor.transports import HttpChunkSender
+
+
+def make_chunk(sequence: int) -> DataChunk:
+    return DataChunk(
+        sensor_id="sensor-1",
+        event_id="event-1",
+        sequence=sequence,
+        chunk_index=0,
+        chunk_count=1,
+        compression="gzip",
+        payload=b"x" * 1024,
+        chunk_sha256=b"\x00" * 32,
+        event_sha256=b"\x00" * 32,
+        created_at="2024-01-01T00:00:00Z",
+        logical_timestamp_ms=0,
+        clock_skew_ms=0.0,
+        attributes={"window_id": "w1"},
+    )
+
+
+def start_server(statuses):
+    received = []
+    connections = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):  # noqa: N802
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if self.path == "/v1/ingest/chunks":
+                received.append([chunk.sequence for chunk in decode_chunk_batch(body)])
+            else:
+                received.append(decode_chunk(body, self.headers["Content-Type"]).sequence)
+            connections.add(self.client_address)
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, fmt, *args):
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received, connections
+
+
+def test_http_sender_reuses_connection_and_encoding(monkeypatch):
+    encode_chunk = transports.encode_chunk
+    encoded = []
+
+    def counting_encode(chunk):
+        encoded.append(chunk.sequence)
+        return encode_chunk(chunk)
+
+    monkeypatch.setattr(transports, "encode_chunk", counting_encode)
+    server, received, connections = start_server([503, 503])
+    sender = HttpChunkSender(f"http://127.0.0.1:{server.server_address[1]}/v1/ingest/chunk")
+
+    async def scenario():
+        chunk = make_chunk(1)
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="status=503"):
+                await sender.send_chunk(chunk)
+        await sender.send_chunk(chunk)
+        await sender.send_chunk(make_chunk(2))
+        await sender.close()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert received == [1, 1, 1, 2]
+    assert encoded == [1, 2]
+    assert len(connections) == 1
+
+
+def test_http_sender_posts_bulk_batches():
+    server, received, _ = start_server([503])
+    port = server.server_address[1]
+    sender = HttpChunkSender(
+        f"http://127.0.0.1:{port}/v1/ingest/chunk", bulk_path="/v1/ingest/chunks"
+    )
+    assert sender.supports_bulk
+
+    async def scenario():
+        batch = [make_chunk(1), make_chunk(2), make_chunk(3)]
+        with pytest.raises(RuntimeError, match="status=503"):
+            await sender.send_chunks(batch)
+        await sender.send_chunks(batch)
+        await sender.close()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert received == [[1, 2, 3], [1, 2, 3]]
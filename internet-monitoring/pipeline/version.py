@@ -1,4 +1,4 @@
 """Shared constants for pipeline schema compatibility."""
 
 # Increment when breaking wire changes ship; keep in sync with proto files.
-PIPELINE_SCHEMA_VERSION = "1.0.0"
+PIPELINE_SCHEMA_VERSION = "2.0.0"